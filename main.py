@@ -5,8 +5,17 @@ import os
 from dotenv import load_dotenv
 from temporalio.client import Client
 from temporalio.worker import Worker
-
+from temporalio.worker.workflow_sandbox import (
+    SandboxedWorkflowRunner,
+    SandboxRestrictions,
+)
+
+from utils.claim_check import offload_payload
+from utils.connection_manager import ConnectionManager
+from utils.data_converter import build_data_converter
 from utils.failure_logger import log_failure
+from utils.minio_service import MinioService
+from utils.workflow_options import configure_workflow_options, get_workflow_options
 
 load_dotenv()
 
@@ -37,6 +46,14 @@ def parse_arguments():
         help="Temporal server host:port (default: datanadhi-temporal:7233)",
     )
 
+    parser.add_argument(
+        "--local-config-activities",
+        action=argparse.BooleanOptionalAction,
+        default=get_workflow_options().local_config_activities,
+        help="Run config-fetch activities as local activities "
+        "(default: LOCAL_CONFIG_ACTIVITIES or false)",
+    )
+
     parser.add_argument(
         "--verbose", "-v", action="store_true", help="Enable verbose logging"
     )
@@ -44,6 +61,49 @@ def parse_arguments():
     return parser.parse_args()
 
 
+def build_connection_manager(worker_type: str) -> ConnectionManager:
+    """Register the backends each worker type talks to for health monitoring."""
+    manager = ConnectionManager()
+
+    if worker_type in ("main", "destination"):
+        from utils.db.async_mongo import AsyncMongoService
+        from utils.db.async_redis import AsyncRedisService
+
+        redis = AsyncRedisService()
+        mongo = AsyncMongoService()
+        manager.register("redis", redis.is_connected, redis.connect)
+        manager.register("mongo", mongo.is_connected, mongo.connect)
+
+    # Every worker logs failures to MinIO
+    manager.register("minio", MinioService().is_connected)
+
+    if worker_type == "main":
+        from temporal_workers.main_worker.dal import config_cache
+
+        # Pipeline/workflow config hits and misses in front of Redis
+        manager.register_stats("config_cache", config_cache.stats)
+
+    if worker_type == "destination":
+        from temporal_workers.destination_worker.dal import connector_cache
+        from temporal_workers.destination_worker.destinations.slack_aggregator import (
+            slack_aggregator,
+        )
+        from temporal_workers.destination_worker.destinations.slack_clients import (
+            slack_client_pool,
+        )
+        from temporal_workers.destination_worker.destinations.slack_rate_limit import (
+            slack_rate_limiter,
+        )
+
+        manager.register_stats("connector_cache", connector_cache.stats)
+        # Throttled sends, time spent waiting and sends held back right now
+        manager.register_stats("slack_rate_limiter", slack_rate_limiter.stats)
+        manager.register_stats("slack_aggregator", slack_aggregator.stats)
+        manager.register_stats("slack_client_pool", slack_client_pool.stats)
+
+    return manager
+
+
 async def main():
     # Parse command-line arguments
     args = parse_arguments()
@@ -53,49 +113,95 @@ async def main():
         print(f"  Worker Type: {args.worker_type}")
         print(f"  Task Queue: {args.task_queue}")
         print(f"  Temporal Host: {args.temporal_host}")
+        print(f"  Local Config Activities: {args.local_config_activities}")
+
+    configure_workflow_options(local_config_activities=args.local_config_activities)
 
     workflows = activities = []
+    worker_options = {}
 
     if args.worker_type == "main":
         from temporal_workers.main_worker.activities import (
+            count_batch_records,
+            fetch_pipeline_bundle,
             fetch_pipeline_config,
             fetch_workflow_config,
         )
-        from temporal_workers.main_worker.workflow import MainWorkflow
+        from temporal_workers.main_worker.workflow import (
+            BatchMainWorkflow,
+            MainWorkflow,
+        )
 
-        workflows = [MainWorkflow]
-        activities = [fetch_pipeline_config, fetch_workflow_config, log_failure]
+        workflows = [MainWorkflow, BatchMainWorkflow]
+        activities = [
+            fetch_pipeline_bundle,
+            fetch_pipeline_config,
+            fetch_workflow_config,
+            count_batch_records,
+            offload_payload,
+            log_failure,
+        ]
 
     elif args.worker_type == "transformation":
-        from temporal_workers.transformation_worker.activities import filters, transform
+        from temporal_workers.transformation_worker.activities import (
+            check_workflow_config,
+            filters,
+            run_pipeline_batch,
+            run_pipeline_inline,
+            transform,
+            transform_chain,
+        )
         from temporal_workers.transformation_worker.workflow import (
             TransformationWorkflow,
         )
 
         workflows = [TransformationWorkflow]
-        activities = [filters, transform, log_failure]
+        activities = [
+            filters,
+            transform,
+            transform_chain,
+            run_pipeline_inline,
+            run_pipeline_batch,
+            check_workflow_config,
+            log_failure,
+        ]
 
     elif args.worker_type == "destination":
         from temporal_workers.destination_worker.activities import (
+            fetch_destination_bundle,
             fetch_integration_connector,
             fetch_integration_target,
+            send_batch_to_destination,
             send_to_destination,
         )
+        from temporal_workers.destination_worker.destinations import (
+            DestinationRegistry,
+        )
         from temporal_workers.destination_worker.workflow import DestinationWorkflow
 
+        DestinationRegistry.load()
+
         workflows = [DestinationWorkflow]
         activities = [
+            fetch_destination_bundle,
             fetch_integration_target,
             fetch_integration_connector,
             send_to_destination,
+            send_batch_to_destination,
             log_failure,
         ]
+        # Sends are async, so one worker can keep many in flight
+        worker_options["max_concurrent_activities"] = int(
+            os.getenv("DESTINATION_MAX_CONCURRENT_ACTIVITIES", "500")
+        )
 
     else:
         raise ValueError(f"Worker type not supported: {args.worker_type}")
 
     # Connect to Temporal server
-    client = await Client.connect(args.temporal_host)
+    client = await Client.connect(
+        args.temporal_host, data_converter=build_data_converter()
+    )
 
     # Create worker for a specific task queue
     worker = Worker(
@@ -103,14 +209,41 @@ async def main():
         task_queue=args.task_queue,  # Task queue name
         workflows=workflows,  # Optional: workflows
         activities=activities,  # Activities this worker will handle
+        # Share the configured WorkflowOptions with sandboxed workflows
+        workflow_runner=SandboxedWorkflowRunner(
+            restrictions=SandboxRestrictions.default.with_passthrough_modules(
+                "utils.workflow_options"
+            )
+        ),
+        **worker_options,
     )
 
+    # Health-check backends in the background instead of pinging per request
+    connection_manager = build_connection_manager(args.worker_type)
+    await connection_manager.start()
+
+    if args.verbose:
+        print(f"  Backends: {connection_manager.status()}")
+
     print(
         f"Worker started on task queue {args.task_queue} with type {args.worker_type}"
     )
 
     # Run the worker
-    await worker.run()
+    try:
+        await worker.run()
+    finally:
+        await connection_manager.stop()
+        if args.worker_type == "destination":
+            from temporal_workers.destination_worker.destinations.http_client import (
+                http_client,
+            )
+            from temporal_workers.destination_worker.destinations.slack_clients import (
+                slack_client_pool,
+            )
+
+            await slack_client_pool.close()
+            await http_client.close()
 
 
 if __name__ == "__main__":
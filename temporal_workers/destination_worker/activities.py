@@ -1,25 +1,36 @@
+import asyncio
+import traceback
 from typing import Any
 
 from temporalio import activity
 
-from utils.exceptions import IntegrationNotFoundError, UnsupportedIntegrationTypeError
+from utils.batch_records import resolve_batch_payloads
+from utils.claim_check import resolve_claim_check
+from utils.exceptions import (
+    DataNadhiError,
+    IntegrationNotFoundError,
+    UnsupportedIntegrationTypeError,
+)
 from utils.logger import log_debug, log_error
 
-from .dal import get_integration_connector, get_integration_target
+from .dal import (
+    get_destination_bundle,
+    get_integration_connector,
+    get_integration_target,
+    without_credentials,
+)
 from .destinations import DestinationRegistry
 from .destinations.core import Destination
 
+# Per-record attempts for retryable errors inside send_batch_to_destination
+BATCH_SEND_MAX_ATTEMPTS = 3
 
-@activity.defn
-async def fetch_integration_connector(
+
+async def load_integration_connector(
     org_id: str, project_id: str, connector_id: str, ctx: dict
 ) -> dict:
-    log_debug(
-        "Fetching integration connector from DB",
-        ctx,
-        {"connector_id": connector_id},
-    )
-    connector = get_integration_connector(org_id, project_id, connector_id)
+    """Connector with decrypted credentials, for use inside this process only."""
+    connector = await get_integration_connector(org_id, project_id, connector_id)
     if not connector:
         log_error(
             "Integration connector not found", ctx, {"connector_id": connector_id}
@@ -30,20 +41,67 @@ async def fetch_integration_connector(
     return connector
 
 
+@activity.defn
+async def fetch_integration_connector(
+    org_id: str, project_id: str, connector_id: str, ctx: dict
+) -> dict:
+    log_debug(
+        "Fetching integration connector from DB",
+        ctx,
+        {"connector_id": connector_id},
+    )
+    connector = await load_integration_connector(org_id, project_id, connector_id, ctx)
+    # Credentials never leave the worker; send_to_destination loads them itself
+    return without_credentials(connector)
+
+
 @activity.defn
 async def fetch_integration_target(
     org_id: str, project_id: str, pipeline_id: str, target_id: str, ctx: dict
 ) -> dict:
     log_debug("Fetching integration target from DB", ctx, {"target_id": target_id})
-    target = get_integration_target(org_id, project_id, pipeline_id, target_id)
+    target = await get_integration_target(org_id, project_id, pipeline_id, target_id)
     if not target:
         log_error("Integration target not found", ctx, {"target_id": target_id})
         raise IntegrationNotFoundError(f"Integration target not found: {target_id}")
     return target
 
 
+async def load_destination_bundle(
+    org_id: str, project_id: str, pipeline_id: str, target_id: str, ctx: dict
+) -> tuple[dict, dict | None]:
+    """Target and its connector with decrypted credentials, for this process only."""
+    target, connector = await get_destination_bundle(
+        org_id, project_id, pipeline_id, target_id
+    )
+    if not target:
+        log_error("Integration target not found", ctx, {"target_id": target_id})
+        raise IntegrationNotFoundError(f"Integration target not found: {target_id}")
+    if "connectorId" in target and not connector:
+        connector_id = target["connectorId"]
+        log_error(
+            "Integration connector not found", ctx, {"connector_id": connector_id}
+        )
+        raise IntegrationNotFoundError(
+            f"Integration connector not found: {connector_id}"
+        )
+    return target, connector
+
+
 @activity.defn
-async def send_to_destination(input: Any, target: dict, connector: dict, ctx: dict):
+async def fetch_destination_bundle(
+    org_id: str, project_id: str, pipeline_id: str, target_id: str, ctx: dict
+) -> dict:
+    log_debug("Fetching destination bundle from DB", ctx, {"target_id": target_id})
+    target, connector = await load_destination_bundle(
+        org_id, project_id, pipeline_id, target_id, ctx
+    )
+    # Credentials never leave the worker; send_to_destination loads them itself
+    return {"target": target, "connector": without_credentials(connector)}
+
+
+async def deliver(input: Any, target: dict, connector: dict, ctx: dict):
+    """Send one record through the destination for the connector's type."""
     log_debug(
         "Sending to destination",
         ctx,
@@ -62,7 +120,7 @@ async def send_to_destination(input: Any, target: dict, connector: dict, ctx: di
 
     try:
         destination: Destination = destination_class(input, target, connector)
-        result = destination.send()
+        result = await destination.send()
         log_debug("Destination send completed", ctx, {"result": result})
         return result
     except (ValueError, KeyError, TypeError) as exc:
@@ -73,3 +131,106 @@ async def send_to_destination(input: Any, target: dict, connector: dict, ctx: di
     except Exception:
         # Other exceptions (connection issues, etc.) are retryable
         raise
+
+
+@activity.defn
+async def send_to_destination(
+    input: Any, target: dict, connector: dict | None, ctx: dict
+):
+    """
+    Deliver one record to a target.
+
+    connector (from the workflow) carries no credentials; the decrypted connector
+    is loaded in this process, from connector_cache or Redis/Mongo.
+    """
+    connector = await load_integration_connector(
+        ctx.get("organisationId"), ctx.get("projectId"), target["connectorId"], ctx
+    )
+    return await deliver(await resolve_claim_check(input), target, connector, ctx)
+
+
+@activity.defn
+async def send_batch_to_destination(
+    records: list[dict], target_id: str, ctx: dict
+) -> list[dict]:
+    """
+    Deliver a batch of records to one integration target.
+
+    Target and connector are fetched once for the whole batch. Each record is sent
+    independently: retryable errors are retried in place with backoff, and records
+    that still fail are reported back instead of failing the batch, so records
+    already sent are never re-sent by an activity retry.
+
+    Args:
+        records: [{messageId, data}]; data may be a {records_ref, index}
+            reference into a chunk stored by run_pipeline_batch
+
+    Returns:
+        One entry per record: {messageId, success, result} or {messageId, success,
+        error: {type, message, stack}}
+    """
+    log_debug(
+        "Sending batch to destination",
+        ctx,
+        {"target_id": target_id, "record_count": len(records)},
+    )
+    log_debug("Fetching destination bundle from DB", ctx, {"target_id": target_id})
+    target, connector = await load_destination_bundle(
+        ctx.get("organisationId"),
+        ctx.get("projectId"),
+        ctx.get("pipelineId"),
+        target_id,
+        ctx,
+    )
+
+    payloads = await resolve_batch_payloads([record.get("data") for record in records])
+
+    async def send_record(record: dict, data) -> dict:
+        record_ctx = {**ctx, "messageId": record.get("messageId")}
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                result = await deliver(
+                    await resolve_claim_check(data),
+                    target,
+                    connector,
+                    record_ctx,
+                )
+                return {
+                    "messageId": record.get("messageId"),
+                    "success": True,
+                    "result": result,
+                }
+            except Exception as exc:
+                retryable = not isinstance(exc, DataNadhiError)
+                if retryable and attempt < BATCH_SEND_MAX_ATTEMPTS:
+                    await asyncio.sleep(2 ** (attempt - 1))
+                    continue
+                return {
+                    "messageId": record.get("messageId"),
+                    "success": False,
+                    "error": {
+                        "type": type(exc).__name__,
+                        "message": str(exc),
+                        "stack": traceback.format_exc(),
+                    },
+                }
+
+    try:
+        destination_class = DestinationRegistry.get(connector["integrationType"])
+        concurrent = destination_class.sends_concurrently(target)
+    except (ValueError, KeyError, TypeError):
+        # Reported per record by deliver
+        concurrent = False
+
+    if concurrent:
+        return list(
+            await asyncio.gather(
+                *(send_record(r, p) for r, p in zip(records, payloads, strict=True))
+            )
+        )
+    return [
+        await send_record(record, data)
+        for record, data in zip(records, payloads, strict=True)
+    ]
@@ -3,28 +3,36 @@ import os
 
 from dotenv import load_dotenv
 
-from utils.db.mongo import MongoService
-from utils.db.redis import RedisService
+from utils.db.async_mongo import AsyncMongoService
+from utils.db.async_redis import AsyncRedisService
+from utils.local_cache import LocalCache
 
 from .utils import decrypt_aes_gcm
 
 load_dotenv()
 
+# Connectors with decrypted credentials, kept only in this process
+connector_cache = LocalCache(
+    "destination_worker.connectors",
+    max_size=int(os.getenv("CONNECTOR_CACHE_MAX_SIZE", "1024")),
+    ttl_seconds=float(os.getenv("CONNECTOR_CACHE_TTL_SECONDS", "60")),
+)
 
-def get_integration_target(org_id, project_id, pipeline_id, target_id):
-    mongo = MongoService()
-    redis = RedisService()
+
+async def get_integration_target(org_id, project_id, pipeline_id, target_id):
+    mongo = AsyncMongoService()
+    redis = AsyncRedisService()
 
     # Fetch from cache
-    integration_target = redis.safe_get(
+    integration_target = await redis.safe_get(
         f"datanadhiserver:org:{org_id}:prj:{project_id}:pl:{pipeline_id}:it:{target_id}"
     )
 
     if integration_target:
         return json.loads(integration_target)
 
-    integration_targets = mongo.db().get_collection("IntegrationTargets")
-    integration_target = integration_targets.find_one(
+    integration_targets = (await mongo.db()).get_collection("IntegrationTargets")
+    integration_target = await integration_targets.find_one(
         {
             "organisationId": org_id,
             "projectId": project_id,
@@ -33,9 +41,12 @@ def get_integration_target(org_id, project_id, pipeline_id, target_id):
         }
     )
 
+    if not integration_target:
+        return None
+
     del integration_target["_id"]
 
-    redis.safe_set(
+    await redis.safe_set(
         f"datanadhiserver:org:{org_id}:prj:{project_id}:pl:{pipeline_id}:it:{target_id}",
         json.dumps(integration_target),
         ex=3600,
@@ -44,20 +55,23 @@ def get_integration_target(org_id, project_id, pipeline_id, target_id):
     return integration_target
 
 
-def get_integration_connector(org_id, project_id, connector_id):
-    mongo = MongoService()
-    redis = RedisService()
+def _connector_key(org_id: str, project_id: str, connector_id: str) -> str:
+    return f"datanadhiserver:org:{org_id}:prj:{project_id}:ic:{connector_id}"
 
-    # Fetch from cache
-    integration_connector = redis.safe_get(
-        f"datanadhiserver:org:{org_id}:prj:{project_id}:ic:{connector_id}:decrypted"
-    )
 
+async def _load_integration_connector(org_id, project_id, connector_id):
+    """Connector with encrypted credentials, from Redis or Mongo."""
+    redis = AsyncRedisService()
+    # Only ciphertext goes to Redis; credentials are decrypted in process
+    redis_key = f"{_connector_key(org_id, project_id, connector_id)}:encrypted"
+
+    integration_connector = await redis.safe_get(redis_key)
     if integration_connector:
         return json.loads(integration_connector)
 
-    integration_connectors = mongo.db().get_collection("IntegrationConnectors")
-    integration_connector = integration_connectors.find_one(
+    mongo = AsyncMongoService()
+    integration_connectors = (await mongo.db()).get_collection("IntegrationConnectors")
+    integration_connector = await integration_connectors.find_one(
         {
             "organisationId": org_id,
             "projectId": project_id,
@@ -65,17 +79,73 @@ def get_integration_connector(org_id, project_id, connector_id):
         }
     )
 
+    if not integration_connector:
+        return None
+
     del integration_connector["_id"]
+    await redis.safe_set(redis_key, json.dumps(integration_connector), ex=3600)
+    return integration_connector
 
-    encrypted_creds = integration_connector["encryptedCredentials"]
-    decrypted_creds = decrypt_aes_gcm(encrypted_creds, os.environ["SEC_DB"])
 
-    integration_connector["creds"] = json.loads(decrypted_creds)
+async def get_integration_connector(org_id, project_id, connector_id):
+    cache_key = _connector_key(org_id, project_id, connector_id)
 
-    redis.safe_set(
-        f"datanadhiserver:org:{org_id}:prj:{project_id}:ic:{connector_id}:decrypted",
-        json.dumps(integration_connector),
-        ex=3600,
+    # Decrypted connectors are only ever held in process memory
+    integration_connector = connector_cache.get(cache_key)
+    if integration_connector is not None:
+        return integration_connector
+
+    integration_connector = await _load_integration_connector(
+        org_id, project_id, connector_id
     )
+    if not integration_connector:
+        return None
 
+    encrypted_creds = integration_connector["encryptedCredentials"]
+    decrypted_creds = decrypt_aes_gcm(encrypted_creds, os.environ["SEC_DB"])
+    integration_connector["creds"] = json.loads(decrypted_creds)
+
+    connector_cache.set(cache_key, integration_connector)
     return integration_connector
+
+
+def without_credentials(integration_connector: dict | None) -> dict | None:
+    """
+    Connector without its credentials (decrypted or encrypted), safe to return
+    from an activity: activity results are stored in workflow history.
+    """
+    if integration_connector is None:
+        return None
+    return {
+        key: value
+        for key, value in integration_connector.items()
+        if key not in ("creds", "encryptedCredentials")
+    }
+
+
+def evict_integration_connector(org_id, project_id, connector_id) -> bool:
+    """
+    Drop a connector's decrypted credentials from this process, e.g. after they
+    were rotated. Returns True if it was cached.
+    """
+    return connector_cache.delete(_connector_key(org_id, project_id, connector_id))
+
+
+async def get_destination_bundle(org_id, project_id, pipeline_id, target_id):
+    """
+    Fetch an integration target and its connector in one call.
+
+    The connector id lives on the target, so the two lookups stay sequential;
+    the saving is the activity round trip, not a Redis round trip.
+
+    Returns:
+        Tuple of (target, connector); connector is None if the target is missing
+    """
+    target = await get_integration_target(org_id, project_id, pipeline_id, target_id)
+    if not target or "connectorId" not in target:
+        return target, None
+
+    connector = await get_integration_connector(
+        org_id, project_id, target["connectorId"]
+    )
+    return target, connector
@@ -1,17 +1,41 @@
 import importlib
 
+from .core import as_async_destination
+
 
 class DestinationRegistry:
     _registry = {
-        "slack": "temporal_workers.destination_worker.destinations.slack.SlackDestination",
+        "slack": f"{__name__}.slack.SlackDestination",
+        "webhook": f"{__name__}.webhook.WebhookDestination",
     }
+    # Resolved (and async-adapted) classes; filled by load() at worker startup
+    _classes: dict[str, type] = {}
 
     @classmethod
-    def get(cls, name: str):
+    def _resolve(cls, name: str) -> type:
         path = cls._registry.get(name)
         if not path:
             raise ValueError(f"Unknown destination: {name}")
 
         module_name, class_name = path.rsplit(".", 1)
         module = importlib.import_module(module_name)
-        return getattr(module, class_name)
+        return as_async_destination(getattr(module, class_name))
+
+    @classmethod
+    def load(cls):
+        """Import every registered destination, so sends never import at runtime."""
+        for name in cls._registry:
+            cls._classes[name] = cls._resolve(name)
+
+    @classmethod
+    def register(cls, name: str, path: str):
+        """Register a destination class by dotted path."""
+        cls._registry[name] = path
+        cls._classes.pop(name, None)
+
+    @classmethod
+    def get(cls, name: str):
+        destination_class = cls._classes.get(name)
+        if destination_class is None:
+            destination_class = cls._classes[name] = cls._resolve(name)
+        return destination_class
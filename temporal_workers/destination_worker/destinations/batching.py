@@ -0,0 +1,122 @@
+"""
+Coalescing of concurrent sends into batches, shared by destinations.
+
+Items submitted under the same key within a window (or until max_items are
+pending) are flushed together with one call to the flush function. Every
+submit waits for that flush and gets its result, or its exception, so each send
+still only succeeds once its item has actually been delivered.
+
+A flush that delivers items in several parts raises PartialFlushError when a
+later part fails, so the items already delivered still succeed and only the
+rest fail (and are retried by their activities).
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+FlushFn = Callable[[Any, list], Awaitable[Any]]
+
+
+class PartialFlushError(Exception):
+    """
+    Raised by a flush function after delivering only the first items of a batch.
+
+    Args:
+        error: Why the remaining items failed; raised by their submits
+        delivered: Number of items, from the start, that were delivered
+        result: Returned by the submits of the delivered items
+    """
+
+    def __init__(self, error: Exception, delivered: int, result: Any = None):
+        super().__init__(str(error))
+        self.error = error
+        self.delivered = delivered
+        self.result = result
+
+
+class _Batch:
+    __slots__ = ("context", "items", "futures", "timer")
+
+    def __init__(self, context: Any):
+        self.context = context
+        self.items: list = []
+        self.futures: list[asyncio.Future] = []
+        self.timer: asyncio.TimerHandle | None = None
+
+
+class Batcher:
+    def __init__(self, flush: FlushFn):
+        """
+        Args:
+            flush: async (context, items) -> result, called once per batch with
+                the context of the submit that opened it
+        """
+        self._flush_fn = flush
+        self._batches: dict[Hashable, _Batch] = {}
+        # Strong references, so pending flushes aren't garbage collected
+        self._flushes: set[asyncio.Task] = set()
+
+    async def submit(
+        self,
+        key: Hashable,
+        item: Any,
+        window_seconds: float,
+        max_items: int,
+        context: Any = None,
+    ) -> Any:
+        """Add item to the open batch for key and wait for it to be flushed."""
+        loop = asyncio.get_running_loop()
+        batch = self._batches.get(key)
+        if batch is None:
+            batch = _Batch(context)
+            batch.timer = loop.call_later(window_seconds, self._flush, key, batch)
+            self._batches[key] = batch
+
+        future = loop.create_future()
+        batch.items.append(item)
+        batch.futures.append(future)
+        if len(batch.items) >= max_items:
+            self._flush(key, batch)
+        return await future
+
+    def _flush(self, key: Hashable, batch: _Batch):
+        if self._batches.get(key) is not batch:
+            # Already flushed by count before the window elapsed
+            return
+        del self._batches[key]
+        batch.timer.cancel()
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _run(self, batch: _Batch):
+        try:
+            result = await self._flush_fn(batch.context, batch.items)
+        except PartialFlushError as exc:
+            self._resolve(batch.futures[: exc.delivered], result=exc.result)
+            self._resolve(batch.futures[exc.delivered :], error=exc.error)
+            return
+        except Exception as exc:
+            self._resolve(batch.futures, error=exc)
+            return
+        self._resolve(batch.futures, result=result)
+
+    @staticmethod
+    def _resolve(
+        futures: list[asyncio.Future],
+        result: Any = None,
+        error: Exception | None = None,
+    ):
+        for future in futures:
+            if future.done():
+                # Cancelled submit
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def __len__(self) -> int:
+        """Open batches."""
+        return len(self._batches)
@@ -1,6 +1,16 @@
+import asyncio
+import inspect
+import os
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
+# Runs send() of synchronous destinations, off the activity event loop
+sync_send_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("DESTINATION_SYNC_SEND_THREADS", "32")),
+    thread_name_prefix="destination-send",
+)
+
 
 class Destination(ABC):
     def __init__(self, input: Any, target_config: dict, connector_config: dict):
@@ -9,5 +19,33 @@ class Destination(ABC):
         self.connector_config = connector_config
 
     @abstractmethod
-    def send(self):
-        pass
+    async def send(self):
+        """Deliver self.input. Must not block the event loop."""
+
+    @classmethod
+    def sends_concurrently(cls, target_config: dict) -> bool:
+        """Whether a batch's records can be sent concurrently rather than in order."""
+        return False
+
+
+def as_async_destination(destination_class: type) -> type:
+    """
+    Destination class with an async send.
+
+    Classes whose send is a plain function (blocking HTTP clients, etc.) are
+    wrapped so send runs in sync_send_executor; async ones are returned as is.
+    """
+    if inspect.iscoroutinefunction(destination_class.send):
+        return destination_class
+
+    sync_send = destination_class.send
+
+    async def send(self):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(sync_send_executor, sync_send, self)
+
+    return type(
+        destination_class.__name__,
+        (destination_class,),
+        {"send": send, "__module__": destination_class.__module__},
+    )
@@ -0,0 +1,55 @@
+"""
+Shared aiohttp session for HTTP destinations.
+
+One session per worker process, so every target reuses keep-alive connections.
+aiohttp pools connections per host; WEBHOOK_MAX_CONNECTIONS_PER_HOST caps each
+host's pool and WEBHOOK_MAX_CONNECTIONS the total.
+"""
+
+import asyncio
+import os
+
+import aiohttp
+
+
+class HttpClient:
+    def __init__(
+        self,
+        max_connections: int = 200,
+        max_connections_per_host: int = 50,
+        keepalive_seconds: float = 30.0,
+    ):
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.keepalive_seconds = keepalive_seconds
+
+        self._session: aiohttp.ClientSession | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def session(self) -> aiohttp.ClientSession:
+        """The shared session, created on first use on the running loop."""
+        session, loop = self._session, asyncio.get_running_loop()
+        # aiohttp sessions can only be used on the loop they were created on
+        if session is None or session.closed or self._loop is not loop:
+            self._loop = loop
+            session = self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.max_connections,
+                    limit_per_host=self.max_connections_per_host,
+                    keepalive_timeout=self.keepalive_seconds,
+                ),
+            )
+        return session
+
+    async def close(self):
+        """Close the session, e.g. on worker shutdown."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+http_client = HttpClient(
+    max_connections=int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "200")),
+    max_connections_per_host=int(os.getenv("WEBHOOK_MAX_CONNECTIONS_PER_HOST", "50")),
+    keepalive_seconds=float(os.getenv("WEBHOOK_KEEPALIVE_SECONDS", "30")),
+)
@@ -1,12 +1,19 @@
-from slack_sdk import WebClient
-
 from ..utils import StringTemplates
 from .core import Destination
+from .slack_aggregator import aggregation_options, slack_aggregator
+from .slack_clients import slack_client_pool, token_digest
+from .slack_rate_limit import post_message, rate_limit_key
 
 supported_actions = ("template-message", "message")
 
 
 class SlackDestination(Destination):
+    @classmethod
+    def sends_concurrently(cls, target_config: dict) -> bool:
+        # Aggregated messages only post once their window fills, so records have
+        # to be in flight together to share a window
+        return bool(target_config.get("destinationParams", {}).get("aggregation"))
+
     def validate(self):
         slack_bot_token = self.connector_config.get("creds", {}).get("slackBotToken")
         if not slack_bot_token:
@@ -26,15 +33,18 @@ class SlackDestination(Destination):
         if action == "template-message" and "template" not in destination_params:
             raise ValueError("template required for templatised message to work")
 
+        if destination_params.get("aggregation"):
+            aggregation_options(destination_params["aggregation"])
+
     def get_template_message(self):
         string_template = StringTemplates(
             self.target_config["destinationParams"]["template"], self.input
         )
         return string_template.render_template()
 
-    def send(self):
+    async def send(self):
         self.validate()
-        client = WebClient(token=self.connector_config["creds"]["slackBotToken"])
+        token = self.connector_config["creds"]["slackBotToken"]
         channel = self.target_config["destinationParams"]["channel"]
 
         action = self.target_config["destinationParams"]["action"]
@@ -44,5 +54,14 @@ class SlackDestination(Destination):
         elif action == "template-message":
             message = self.get_template_message()
 
-        client.chat_postMessage(channel=channel, text=message)
-        {"success": "True", "message_sent": message}
+        connector_id = self.connector_config.get("connectorId")
+        aggregation = self.target_config["destinationParams"].get("aggregation")
+        if aggregation:
+            return await slack_aggregator.post(
+                token, connector_id, channel, message, aggregation_options(aggregation)
+            )
+
+        limit_key = rate_limit_key(connector_id, token_digest(token), channel)
+        async with slack_client_pool.client(token, connector_id) as client:
+            await post_message(client, limit_key, channel=channel, text=message)
+        return {"success": True, "message_sent": message}
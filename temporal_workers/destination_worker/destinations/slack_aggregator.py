@@ -0,0 +1,211 @@
+"""
+Coalescing of Slack messages per (bot token, channel).
+
+Targets with destinationParams.aggregation buffer their rendered messages for up
+to windowSeconds, or until maxMessages are buffered, then post them together:
+
+    {"mode": "digest", "windowSeconds": 5, "maxMessages": 50}
+
+Modes:
+    digest  one message with every buffered message on its own line
+    thread  the first message, with the rest as one threaded reply
+    blocks  one message with a section block per buffered message
+
+A send only returns once its message has been posted (or raises if the post
+failed), so activity retries keep working: the window must stay well inside the
+activity timeout. When a window takes several posts (a thread's parent and reply,
+or chunks over Slack's limits) and one fails, messages in the posts before it
+still succeed, so their activities aren't retried into duplicates. A message
+whose send was cancelled after it was buffered is still posted.
+"""
+
+from typing import Any
+
+from .batching import Batcher, PartialFlushError
+from .slack_clients import SlackClientPool, slack_client_pool, token_digest
+from .slack_rate_limit import post_message, rate_limit_key
+
+AGGREGATION_MODES = ("digest", "thread", "blocks")
+DEFAULT_AGGREGATION = {"mode": "digest", "windowSeconds": 5, "maxMessages": 50}
+MAX_WINDOW_SECONDS = 60
+
+# Slack truncates text beyond 40k characters, and allows 50 blocks per message
+# with up to 3000 characters of text per section
+MAX_TEXT_LENGTH = 39000
+MAX_BLOCKS = 50
+MAX_SECTION_LENGTH = 3000
+
+
+def aggregation_options(aggregation: Any) -> dict:
+    """
+    Validated aggregation config with defaults applied.
+
+    Raises:
+        ValueError: if the config is invalid
+    """
+    if aggregation is True:
+        aggregation = {}
+    if not isinstance(aggregation, dict):
+        raise ValueError("aggregation must be an object")
+    options = {**DEFAULT_AGGREGATION, **aggregation}
+
+    if options["mode"] not in AGGREGATION_MODES:
+        raise ValueError(
+            f"Unsupported aggregation mode {options['mode']}. "
+            f"Supported modes {AGGREGATION_MODES}"
+        )
+    window = options["windowSeconds"]
+    if (
+        isinstance(window, bool)
+        or not isinstance(window, int | float)
+        or not 0 < window <= MAX_WINDOW_SECONDS
+    ):
+        raise ValueError(
+            f"aggregation windowSeconds must be between 0 and {MAX_WINDOW_SECONDS}"
+        )
+    max_messages = options["maxMessages"]
+    if isinstance(max_messages, bool) or not isinstance(max_messages, int):
+        raise ValueError("aggregation maxMessages must be an integer")
+    if max_messages < 1:
+        raise ValueError("aggregation maxMessages must be at least 1")
+    return options
+
+
+def _chunk_text(messages: list[str]) -> list[list[str]]:
+    """Group messages into as few texts as fit Slack's length limit."""
+    chunks, current, length = [], [], 0
+    for message in messages:
+        if current and length + len(message) + 1 > MAX_TEXT_LENGTH:
+            chunks.append(current)
+            current, length = [], 0
+        current.append(message)
+        length += len(message) + 1
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _section(message: str) -> dict:
+    if len(message) > MAX_SECTION_LENGTH:
+        message = message[: MAX_SECTION_LENGTH - 1] + "…"
+    return {"type": "section", "text": {"type": "mrkdwn", "text": message}}
+
+
+class _Window:
+    """What a buffered batch of messages is posted with."""
+
+    __slots__ = ("token", "connector_key", "channel", "options")
+
+    def __init__(self, token: str, connector_key: str | None, channel: str, options):
+        self.token = token
+        self.connector_key = connector_key
+        self.channel = channel
+        self.options = options
+
+
+class SlackAggregator:
+    def __init__(self, pool: SlackClientPool):
+        self.pool = pool
+        self._batcher = Batcher(self._send)
+
+        self.messages = 0
+        self.posts = 0
+
+    async def post(
+        self,
+        token: str,
+        connector_key: str | None,
+        channel: str,
+        message: str,
+        aggregation: dict,
+    ) -> dict:
+        """
+        Buffer a message and wait until the post containing it is sent.
+
+        Args:
+            token: Slack bot token
+            connector_key: Connector id, used to pick the pooled client
+            channel: Slack channel
+            message: Rendered message
+            aggregation: Options from aggregation_options
+
+        Returns:
+            {"success", "message_sent", "aggregated": {"mode", "count"}}
+        """
+        self.messages += 1
+        count = await self._batcher.submit(
+            (token, channel, aggregation["mode"]),
+            message,
+            window_seconds=aggregation["windowSeconds"],
+            max_items=aggregation["maxMessages"],
+            context=_Window(token, connector_key, channel, aggregation),
+        )
+        return {
+            "success": True,
+            "message_sent": message,
+            "aggregated": {"mode": aggregation["mode"], "count": count},
+        }
+
+    async def _send(self, window: _Window, messages: list[str]) -> int:
+        delivered = 0
+        try:
+            async with self.pool.client(window.token, window.connector_key) as client:
+                async for count in self._post(client, window, messages):
+                    delivered += count
+        except Exception as exc:
+            if not delivered:
+                raise
+            # Messages already posted succeed; only the rest fail and are retried
+            raise PartialFlushError(exc, delivered, delivered) from exc
+        return len(messages)
+
+    async def _post(self, client, window: _Window, messages: list[str]):
+        """Post messages in order, yielding how many each post delivered."""
+        mode, channel = window.options["mode"], window.channel
+        limit_key = rate_limit_key(
+            window.connector_key, token_digest(window.token), channel
+        )
+
+        if mode == "blocks":
+            for start in range(0, len(messages), MAX_BLOCKS):
+                chunk = messages[start : start + MAX_BLOCKS]
+                await post_message(
+                    client,
+                    limit_key,
+                    channel=channel,
+                    text=f"{len(chunk)} messages",
+                    blocks=[_section(message) for message in chunk],
+                )
+                self.posts += 1
+                yield len(chunk)
+            return
+
+        thread_ts = None
+        if mode == "thread":
+            parent = await post_message(
+                client, limit_key, channel=channel, text=messages[0]
+            )
+            self.posts += 1
+            yield 1
+            thread_ts, messages = parent["ts"], messages[1:]
+
+        for chunk in _chunk_text(messages):
+            await post_message(
+                client,
+                limit_key,
+                channel=channel,
+                text="\n".join(chunk),
+                thread_ts=thread_ts,
+            )
+            self.posts += 1
+            yield len(chunk)
+
+    def stats(self) -> dict:
+        return {
+            "buffers": len(self._batcher),
+            "messages": self.messages,
+            "posts": self.posts,
+        }
+
+
+slack_aggregator = SlackAggregator(slack_client_pool)
@@ -0,0 +1,153 @@
+"""
+Pooled async Slack clients, one per bot token.
+
+Each client owns an aiohttp session, so posts for the same token reuse
+keep-alive connections to Slack instead of opening a new TLS connection per
+message. Clients are keyed by connector id (falling back to a digest of the
+token), and are replaced when the connector's token changes, closed after
+SLACK_CLIENT_IDLE_SECONDS without use, and evicted least recently used beyond
+SLACK_CLIENT_MAX_CLIENTS. A client is only closed once no send is using it.
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+import aiohttp
+from slack_sdk.web.async_client import AsyncWebClient
+
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class _PooledClient:
+    __slots__ = ("client", "session", "token_digest", "loop", "last_used", "in_use")
+
+    def __init__(self, token: str, token_digest: str, connections: int):
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=connections)
+        )
+        self.client = AsyncWebClient(token=token, session=self.session)
+        self.token_digest = token_digest
+        # aiohttp sessions can only be used on the loop they were created on
+        self.loop = asyncio.get_running_loop()
+        self.last_used = time.monotonic()
+        self.in_use = 0
+
+
+class SlackClientPool:
+    def __init__(
+        self,
+        idle_seconds: float = 300.0,
+        max_clients: int = 256,
+        connections_per_client: int = 20,
+    ):
+        self.idle_seconds = idle_seconds
+        self.max_clients = max_clients
+        self.connections_per_client = connections_per_client
+
+        self._entries: OrderedDict[str, _PooledClient] = OrderedDict()
+        # Evicted clients still in use; closed by the last send using them
+        self._retired: set[_PooledClient] = set()
+
+        self.created = 0
+        self.evictions = 0
+
+    @asynccontextmanager
+    async def client(
+        self, token: str, key: str | None = None
+    ) -> AsyncIterator[AsyncWebClient]:
+        """
+        Borrow the client for token.
+
+        Args:
+            token: Slack bot token
+            key: Stable id for the credentials (the connector id), so a rotated
+                token replaces the old client instead of idling next to it
+        """
+        entry = self._acquire(token, key)
+        entry.in_use += 1
+        try:
+            yield entry.client
+        finally:
+            entry.in_use -= 1
+            entry.last_used = time.monotonic()
+            if entry in self._retired and entry.in_use == 0:
+                self._retired.discard(entry)
+                await entry.session.close()
+
+    def _acquire(self, token: str, key: str | None) -> _PooledClient:
+        digest = token_digest(token)
+        key = key or digest
+        self._evict_idle()
+
+        entry = self._entries.get(key)
+        if entry is not None and (
+            entry.token_digest != digest or entry.loop is not asyncio.get_running_loop()
+        ):
+            self._evict(key)
+            entry = None
+
+        if entry is None:
+            entry = _PooledClient(token, digest, self.connections_per_client)
+            self._entries[key] = entry
+            self.created += 1
+            while len(self._entries) > self.max_clients:
+                self._evict(next(iter(self._entries)))
+
+        self._entries.move_to_end(key)
+        entry.last_used = time.monotonic()
+        return entry
+
+    def _evict_idle(self):
+        cutoff = time.monotonic() - self.idle_seconds
+        # Least recently used first, so stop at the first recent entry
+        for key, entry in list(self._entries.items()):
+            if entry.last_used > cutoff:
+                break
+            if entry.in_use == 0:
+                self._evict(key)
+
+    def _evict(self, key: str):
+        entry = self._entries.pop(key)
+        self.evictions += 1
+        if entry.in_use:
+            self._retired.add(entry)
+        elif entry.loop is asyncio.get_running_loop():
+            entry.loop.create_task(entry.session.close())
+        elif not entry.loop.is_closed():
+            asyncio.run_coroutine_threadsafe(entry.session.close(), entry.loop)
+
+    def evict(self, key: str):
+        """Drop the client for a connector id (or token digest), if pooled."""
+        if key in self._entries:
+            self._evict(key)
+
+    async def close(self):
+        """Close every pooled client, e.g. on worker shutdown."""
+        entries = [*self._entries.values(), *self._retired]
+        self._entries.clear()
+        self._retired.clear()
+        await asyncio.gather(
+            *(entry.session.close() for entry in entries), return_exceptions=True
+        )
+
+    def stats(self) -> dict:
+        return {
+            "clients": len(self._entries),
+            "retired": len(self._retired),
+            "created": self.created,
+            "evictions": self.evictions,
+        }
+
+
+slack_client_pool = SlackClientPool(
+    idle_seconds=float(os.getenv("SLACK_CLIENT_IDLE_SECONDS", "300")),
+    max_clients=int(os.getenv("SLACK_CLIENT_MAX_CLIENTS", "256")),
+    connections_per_client=int(os.getenv("SLACK_CONNECTIONS_PER_CLIENT", "20")),
+)
@@ -0,0 +1,64 @@
+"""
+Slack posts throttled per (connector, channel) across all destination workers.
+
+chat.postMessage allows about one message per second per channel, with short
+bursts. Every post takes a token from the shared bucket first, and a 429 blocks
+the channel for every worker for the Retry-After Slack sent before retrying.
+"""
+
+import os
+
+from slack_sdk.errors import SlackApiError
+
+from utils.rate_limiter import RateLimitedError, RateLimiter
+
+# 429s retried in place (after waiting out Retry-After) before giving up
+MAX_RATE_LIMITED_RETRIES = 3
+DEFAULT_RETRY_AFTER_SECONDS = 1.0
+HTTP_TOO_MANY_REQUESTS = 429
+
+slack_rate_limiter = RateLimiter(
+    "slack",
+    rate=float(os.getenv("SLACK_RATE_LIMIT_PER_SECOND", "1")),
+    burst=int(os.getenv("SLACK_RATE_LIMIT_BURST", "5")),
+    max_wait_seconds=float(os.getenv("SLACK_RATE_LIMIT_MAX_WAIT_SECONDS", "60")),
+)
+
+
+def rate_limit_key(connector_key: str | None, token_digest: str, channel: str) -> str:
+    return f"ic:{connector_key or token_digest}:ch:{channel}"
+
+
+def _retry_after(exc: SlackApiError) -> float:
+    headers = getattr(exc.response, "headers", None) or {}
+    for name, value in headers.items():
+        if name.lower() == "retry-after":
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                break
+    return DEFAULT_RETRY_AFTER_SECONDS
+
+
+async def post_message(client, limit_key: str, **kwargs):
+    """
+    chat_postMessage through the shared rate limiter.
+
+    Raises:
+        RateLimitedError: if Slack still answers 429 after the retries
+    """
+    for attempt in range(MAX_RATE_LIMITED_RETRIES + 1):
+        await slack_rate_limiter.acquire(limit_key)
+        try:
+            return await client.chat_postMessage(**kwargs)
+        except SlackApiError as exc:
+            if exc.response.status_code != HTTP_TOO_MANY_REQUESTS:
+                raise
+            retry_after = _retry_after(exc)
+            await slack_rate_limiter.block(limit_key, retry_after)
+            if attempt == MAX_RATE_LIMITED_RETRIES:
+                raise RateLimitedError(
+                    f"Slack rate limited channel {kwargs.get('channel')}",
+                    retry_after=retry_after,
+                ) from exc
+    return None
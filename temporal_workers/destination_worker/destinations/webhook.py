@@ -0,0 +1,245 @@
+"""
+HTTP webhook destination.
+
+Posts each record as JSON to destinationParams.url (or the connector's creds.url)
+over the shared keep-alive session in http_client:
+
+    {
+        "url": "https://collector.internal/ingest",
+        "method": "POST",                  # POST, PUT or PATCH
+        "headers": {"X-Source": "datanadhi"},
+        "gzip": false,                     # gzip the request body
+        "timeoutSeconds": 10,              # per request
+        "concurrency": 10,                 # requests in flight per target
+        "batch": {"windowSeconds": 1, "maxRecords": 100}
+    }
+
+With "batch", records sent within the window are posted together as one NDJSON
+body (one JSON record per line). Connector creds.headers (e.g. Authorization)
+are added to every request. 429 and 5xx responses are retryable; other non-2xx
+responses fail the send.
+"""
+
+import asyncio
+import gzip
+import json
+import os
+from typing import Any
+
+import aiohttp
+import orjson
+
+from utils.exceptions import DestinationSendError
+from utils.local_cache import LocalCache
+
+from .batching import Batcher
+from .core import Destination
+from .http_client import http_client
+
+SUPPORTED_METHODS = ("POST", "PUT", "PATCH")
+DEFAULT_TIMEOUT_SECONDS = 10
+DEFAULT_CONCURRENCY = 10
+DEFAULT_BATCH = {"windowSeconds": 1, "maxRecords": 100}
+MAX_BATCH_WINDOW_SECONDS = 60
+
+# Bodies larger than this are gzipped off the event loop
+GZIP_IN_THREAD_BYTES = 64 * 1024
+GZIP_LEVEL = 6
+
+HTTP_TOO_MANY_REQUESTS = 429
+HTTP_SERVER_ERROR = 500
+HTTP_REDIRECT = 300
+MAX_ERROR_BODY_LENGTH = 500
+
+
+class WebhookUnavailableError(Exception):
+    """Target answered 429 or 5xx (retryable)."""
+
+
+def _positive_number(options: dict, field: str, maximum: float | None = None):
+    value = options[field]
+    if isinstance(value, bool) or not isinstance(value, int | float) or value <= 0:
+        raise ValueError(f"{field} must be a positive number")
+    if maximum is not None and value > maximum:
+        raise ValueError(f"{field} must be at most {maximum}")
+    return value
+
+
+def _positive_int(options: dict, field: str) -> int:
+    value = options[field]
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise ValueError(f"{field} must be a positive integer")
+    return value
+
+
+class _Target:
+    """Validated request settings for one webhook target."""
+
+    __slots__ = (
+        "key",
+        "url",
+        "method",
+        "headers",
+        "gzip",
+        "timeout",
+        "concurrency",
+        "batch",
+    )
+
+    def __init__(self, target_config: dict, connector_config: dict):
+        params: dict = target_config.get("destinationParams", {})
+        creds: dict = (connector_config or {}).get("creds", {}) or {}
+
+        self.url = params.get("url") or creds.get("url")
+        if not isinstance(self.url, str) or not self.url.startswith(
+            ("http://", "https://")
+        ):
+            raise ValueError("webhook url must be an http(s) URL")
+
+        self.method = str(params.get("method", "POST")).upper()
+        if self.method not in SUPPORTED_METHODS:
+            raise ValueError(
+                f"Unsupported webhook method {self.method}. "
+                f"Supported methods {SUPPORTED_METHODS}"
+            )
+
+        headers = {**(creds.get("headers") or {}), **(params.get("headers") or {})}
+        if not all(
+            isinstance(k, str) and isinstance(v, str) for k, v in headers.items()
+        ):
+            raise ValueError("webhook headers must map strings to strings")
+        self.headers = headers
+
+        self.gzip = bool(params.get("gzip", False))
+        self.timeout = _positive_number(
+            {"timeoutSeconds": DEFAULT_TIMEOUT_SECONDS, **params}, "timeoutSeconds"
+        )
+        self.concurrency = _positive_int(
+            {"concurrency": DEFAULT_CONCURRENCY, **params}, "concurrency"
+        )
+
+        self.batch = None
+        if params.get("batch"):
+            batch = params["batch"]
+            if batch is True:
+                batch = {}
+            if not isinstance(batch, dict):
+                raise ValueError("webhook batch must be an object")
+            batch = {**DEFAULT_BATCH, **batch}
+            _positive_number(batch, "windowSeconds", MAX_BATCH_WINDOW_SECONDS)
+            _positive_int(batch, "maxRecords")
+            self.batch = batch
+
+        # Requests for the same target share its concurrency limit and batches
+        self.key = (target_config.get("targetId") or self.url, self.url, self.method)
+
+
+class _TargetSlots:
+    """
+    Per-target semaphores capping requests in flight.
+
+    Kept in a LocalCache, so targets that stop sending are dropped after
+    ttl_seconds idle (or when max_size is reached). A target evicted while it
+    still has requests in flight gets a new semaphore, so it can briefly run
+    up to twice its limit.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 300.0):
+        self._slots = LocalCache(
+            "webhook.target_slots", max_size=max_size, ttl_seconds=ttl_seconds
+        )
+
+    def get(self, target: _Target) -> asyncio.Semaphore:
+        key = repr(target.key)
+        entry = self._slots.get(key)
+        if entry is None or entry[0] != target.concurrency:
+            entry = (target.concurrency, asyncio.Semaphore(target.concurrency))
+        # Set on every use, so the idle timeout restarts
+        self._slots.set(key, entry)
+        return entry[1]
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+
+target_slots = _TargetSlots(
+    max_size=int(os.getenv("WEBHOOK_TARGET_SLOTS_MAX_SIZE", "1024")),
+    ttl_seconds=float(os.getenv("WEBHOOK_TARGET_SLOTS_IDLE_SECONDS", "300")),
+)
+
+
+async def _request(target: _Target, body: bytes, content_type: str) -> dict:
+    headers = {**target.headers, "Content-Type": content_type}
+    if target.gzip:
+        if len(body) > GZIP_IN_THREAD_BYTES:
+            body = await asyncio.to_thread(gzip.compress, body, GZIP_LEVEL)
+        else:
+            body = gzip.compress(body, GZIP_LEVEL)
+        headers["Content-Encoding"] = "gzip"
+
+    async with (
+        target_slots.get(target),
+        http_client.session().request(
+            target.method,
+            target.url,
+            data=body,
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=target.timeout),
+        ) as response,
+    ):
+        status = response.status
+        if status < HTTP_REDIRECT:
+            return {"success": True, "status": status}
+        error_body = (await response.text())[:MAX_ERROR_BODY_LENGTH]
+
+    message = f"Webhook {target.url} returned {status}: {error_body}"
+    if status == HTTP_TOO_MANY_REQUESTS or status >= HTTP_SERVER_ERROR:
+        raise WebhookUnavailableError(message)
+    raise DestinationSendError(message)
+
+
+async def _post_batch(target: _Target, lines: list[bytes]) -> dict:
+    result = await _request(target, b"\n".join(lines) + b"\n", "application/x-ndjson")
+    return {**result, "records": len(lines)}
+
+
+webhook_batcher = Batcher(_post_batch)
+
+
+class WebhookDestination(Destination):
+    @classmethod
+    def sends_concurrently(cls, target_config: dict) -> bool:
+        # Ordering isn't guaranteed over HTTP anyway; concurrency caps the load
+        return True
+
+    def validate(self) -> _Target:
+        return _Target(self.target_config, self.connector_config)
+
+    def encode(self, data: Any) -> bytes:
+        try:
+            return orjson.dumps(data)
+        except TypeError:
+            # orjson rejects ints beyond 64 bits, which the stdlib encodes exactly
+            pass
+        try:
+            return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode(
+                "utf-8"
+            )
+        except (TypeError, ValueError) as exc:
+            raise ValueError(f"Record is not JSON serializable: {exc}") from exc
+
+    async def send(self):
+        target = self.validate()
+        body = self.encode(self.input)
+
+        if target.batch:
+            result = await webhook_batcher.submit(
+                target.key,
+                body,
+                window_seconds=target.batch["windowSeconds"],
+                max_items=target.batch["maxRecords"],
+                context=target,
+            )
+            return {**result, "batched": True}
+
+        return await _request(target, body, "application/json")
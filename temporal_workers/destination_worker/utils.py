@@ -2,10 +2,20 @@ import base64
 import hashlib
 import json
 import re
+from collections.abc import Callable
+from functools import lru_cache
 from typing import Any
 
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 
+from utils.keypath import compile_getter
+
+
+@lru_cache(maxsize=4)
+def _aes_gcm(secret: str) -> AESGCM:
+    """Cipher for a secret; the key is SHA-256(secret), derived once per secret."""
+    return AESGCM(hashlib.sha256(secret.encode("utf-8")).digest())
+
 
 def decrypt_aes_gcm(b64: str, secret: str) -> str:
     """Decrypt a base64 string produced by encryptAesGcm in the server.
@@ -21,37 +31,73 @@ def decrypt_aes_gcm(b64: str, secret: str) -> str:
     tag = raw[12:28]
     ciphertext = raw[28:]
 
-    key = hashlib.sha256(secret.encode("utf-8")).digest()  # 32 bytes
-
-    aesgcm = AESGCM(key)
     # cryptography expects ciphertext concatenated with tag
-    plaintext = aesgcm.decrypt(iv, ciphertext + tag, None)
+    plaintext = _aes_gcm(secret).decrypt(iv, ciphertext + tag, None)
 
     return plaintext.decode("utf-8")
 
 
+ESCAPED_DOLLAR = "__ESCAPED_DOLLAR__"
+PLACEHOLDER_PATTERN = re.compile(r"{{\s*\$(.*?)\s*}}")
+
+# A compiled template: literal strings and (getter, placeholder text) pairs
+TemplateSegment = str | tuple[Callable[[Any], Any], str]
+
+
+def _placeholder_getter(path: str) -> Callable[[Any], Any] | None:
+    """Getter for the path inside {{ $... }}; None if the path is malformed."""
+    path = path.strip().lstrip("$")
+    if not path.startswith(("[", ".")):
+        path = f".{path}"
+    try:
+        return compile_getter(f"${path}")
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=1024)
+def compile_template(template: str) -> tuple[TemplateSegment, ...]:
+    """
+    Parse a template once into literal and placeholder segments.
+
+    A backslash-escaped dollar (\\$) is a literal "$" and never starts a
+    placeholder.
+    """
+    escaped = template.replace(r"\$", ESCAPED_DOLLAR)
+    segments: list[TemplateSegment] = []
+    position = 0
+    for match in PLACEHOLDER_PATTERN.finditer(escaped):
+        if match.start() > position:
+            segments.append(escaped[position : match.start()])
+        # Unresolved placeholders are left in the output as written
+        placeholder = match.group(0).replace(ESCAPED_DOLLAR, "$")
+        getter = _placeholder_getter(match.group(1))
+        segments.append((getter, placeholder) if getter else placeholder)
+        position = match.end()
+    if position < len(escaped):
+        segments.append(escaped[position:])
+
+    # Merge adjacent literals so rendering is a single join
+    merged: list[TemplateSegment] = []
+    for segment in segments:
+        if isinstance(segment, str):
+            segment = segment.replace(ESCAPED_DOLLAR, "$")
+            if merged and isinstance(merged[-1], str):
+                merged[-1] += segment
+                continue
+        merged.append(segment)
+    return tuple(merged)
+
+
 class StringTemplates:
     def __init__(self, template, data):
         self.template: str = template
         self.data: dict = data
 
-    def escape_dollar(self):
-        self.template = self.template.replace(r"\$", "__ESCAPED_DOLLAR__")
-
-    def recreate_dollar(self):
-        self.template = self.template.replace("__ESCAPED_DOLLAR__", "$")
-
     def get_value_from_path(self, path: str):
-        """Safely resolve $.a.b.c from nested dict."""
-        keys = path.strip("$.").split(".")
-        current = self.data
-        for k in keys:
-            if not isinstance(current, dict):
-                return None
-            current = current.get(k)
-            if current is None:
-                return None
-        return current
+        """Safely resolve $.a.b[0].c from nested data; None if unresolved."""
+        getter = _placeholder_getter(path)
+        return getter(self.data) if getter else None
 
     @staticmethod
     def stringify(data: Any):
@@ -62,18 +108,17 @@ class StringTemplates:
         except Exception:
             return str(data)
 
-    def replacer(self, match):
-        """Replace {{ $.path }} with value or leave as-is if unresolved."""
-        full_match = match.group(0)  # exact text including spaces
-        path = match.group(1).strip()
-        value = self.get_value_from_path(path)
-        return StringTemplates.stringify(value) if value is not None else full_match
-
     def render_template(self) -> str:
-        self.escape_dollar()
-        pattern = re.compile(r"{{\s*\$(.*?)\s*}}")
-        result = pattern.sub(self.replacer, self.template)
-        self.template = result
-        self.recreate_dollar()
-
-        return self.template
+        """Replace each {{ $.path }} with its value, or leave it if unresolved."""
+        data = self.data
+        parts = []
+        for segment in compile_template(self.template):
+            if isinstance(segment, str):
+                parts.append(segment)
+                continue
+            getter, placeholder = segment
+            value = getter(data)
+            parts.append(
+                StringTemplates.stringify(value) if value is not None else placeholder
+            )
+        return "".join(parts)
@@ -5,7 +5,11 @@ from temporalio import workflow
 from temporalio.exceptions import ActivityError, ApplicationError
 
 from utils.retry_policies import get_default_retry_policy
-from utils.workflow_utils import extract_exception_details
+from utils.workflow_utils import (
+    CONFIG_BUNDLE_PATCH,
+    execute_config_activity,
+    extract_exception_details,
+)
 
 
 @workflow.defn
@@ -22,13 +26,36 @@ class DestinationWorkflow:
                 "reason": "organisationId, projectId and pipelineId required",
             }
 
+        activity_name = "fetch_destination_bundle"
         try:
-            target = await workflow.execute_activity(
-                "fetch_integration_target",
-                args=(org_id, project_id, pipeline_id, target_id, ctx),
-                schedule_to_close_timeout=timedelta(minutes=5),
-                retry_policy=get_default_retry_policy(),
-            )
+            if workflow.patched(CONFIG_BUNDLE_PATCH):
+                bundle = await execute_config_activity(
+                    activity_name, (org_id, project_id, pipeline_id, target_id, ctx)
+                )
+            else:
+                # Started before fetch_destination_bundle; replay the per-item fetches
+                activity_name = "fetch_integration_target"
+                bundle = {
+                    "target": await workflow.execute_activity(
+                        activity_name,
+                        args=(org_id, project_id, pipeline_id, target_id, ctx),
+                        schedule_to_close_timeout=timedelta(minutes=5),
+                        retry_policy=get_default_retry_policy(),
+                    )
+                }
+                if bundle["target"] and "connectorId" in bundle["target"]:
+                    activity_name = "fetch_integration_connector"
+                    bundle["connector"] = await workflow.execute_activity(
+                        activity_name,
+                        args=(
+                            org_id,
+                            project_id,
+                            bundle["target"]["connectorId"],
+                            ctx,
+                        ),
+                        schedule_to_close_timeout=timedelta(minutes=5),
+                        retry_policy=get_default_retry_policy(),
+                    )
         except (ApplicationError, ActivityError) as exc:
             # Log failure and return error response
             exc_type, exc_message, exc_stack = extract_exception_details(exc)
@@ -42,42 +69,20 @@ class DestinationWorkflow:
                     ctx,
                     input,
                     None,
-                    "DestinationWorkflow-fetch_integration_target",
+                    f"DestinationWorkflow-{activity_name}",
                 ),
                 schedule_to_close_timeout=timedelta(minutes=2),
             )
 
+        target = bundle.get("target")
+        connector = bundle.get("connector")
+
         if not target or "connectorId" not in target:
             return {
                 "success": False,
                 "reason": "Required Target info not found",
             }
 
-        try:
-            connector = await workflow.execute_activity(
-                "fetch_integration_connector",
-                args=(org_id, project_id, target["connectorId"], ctx),
-                schedule_to_close_timeout=timedelta(minutes=5),
-                retry_policy=get_default_retry_policy(),
-            )
-        except (ApplicationError, ActivityError) as exc:
-            # Log failure and return error response
-            exc_type, exc_message, exc_stack = extract_exception_details(exc)
-            return await workflow.execute_activity(
-                "log_failure",
-                args=(
-                    exc_type,
-                    exc_message,
-                    exc_stack,
-                    exc_message,
-                    ctx,
-                    input,
-                    None,
-                    "DestinationWorkflow-fetch_integration_connector",
-                ),
-                schedule_to_close_timeout=timedelta(minutes=2),
-            )
-
         try:
             execution = await workflow.execute_activity(
                 "send_to_destination",
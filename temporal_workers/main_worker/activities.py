@@ -1,9 +1,13 @@
 from temporalio import activity
 
-from utils.exceptions import PipelineNotFoundError, WorkflowConfigNotFoundError
+from utils.batch_records import load_batch_records
+from utils.exceptions import (
+    PipelineNotFoundError,
+    WorkflowConfigNotFoundError,
+)
 from utils.logger import log_debug
 
-from .dal import get_pipeline, get_workflow_config
+from .dal import get_pipeline, get_pipeline_bundle, get_workflow_config
 
 
 @activity.defn
@@ -11,7 +15,7 @@ async def fetch_pipeline_config(
     org_id: str, project_id: str, pipeline_id: str, ctx: dict
 ) -> dict:
     log_debug("Fetching pipeline config from DB", ctx)
-    pipeline = get_pipeline(org_id, project_id, pipeline_id)
+    pipeline = await get_pipeline(org_id, project_id, pipeline_id)
     if not pipeline:
         raise PipelineNotFoundError(f"Pipeline not found: {pipeline_id}")
     return pipeline
@@ -22,9 +26,38 @@ async def fetch_workflow_config(
     org_id: str, project_id: str, pipeline_id: str, ctx: dict
 ) -> dict:
     log_debug("Fetching workflow config from DB", ctx)
-    workflow_config = get_workflow_config(org_id, project_id, pipeline_id)
+    workflow_config = await get_workflow_config(org_id, project_id, pipeline_id)
     if not workflow_config:
         raise WorkflowConfigNotFoundError(
             f"Workflow config not found for pipeline: {pipeline_id}"
         )
     return workflow_config
+
+
+@activity.defn
+async def fetch_pipeline_bundle(
+    org_id: str, project_id: str, pipeline_id: str, ctx: dict
+) -> dict:
+    log_debug("Fetching pipeline bundle from DB", ctx)
+    pipeline, workflow_config = await get_pipeline_bundle(
+        org_id, project_id, pipeline_id
+    )
+    if not pipeline:
+        raise PipelineNotFoundError(f"Pipeline not found: {pipeline_id}")
+    if not workflow_config:
+        raise WorkflowConfigNotFoundError(
+            f"Workflow config not found for pipeline: {pipeline_id}"
+        )
+    return {"pipeline": pipeline, "workflow_config": workflow_config}
+
+
+@activity.defn
+async def count_batch_records(records_ref: dict, ctx: dict) -> int:
+    """
+    Number of records in a batch stored in MinIO as a JSON list.
+
+    Only the count goes back to the workflow; run_pipeline_batch loads each chunk
+    itself, so the records never enter workflow history.
+    """
+    log_debug("Counting batch records in MinIO", ctx, {"records_ref": records_ref})
+    return len(await load_batch_records(records_ref))
@@ -1,63 +1,185 @@
+import asyncio
 import json
+import os
 
-from utils.db.mongo import MongoService
-from utils.db.redis import RedisService
+from utils.db.async_mongo import AsyncMongoService
+from utils.db.async_redis import AsyncRedisService
+from utils.exceptions import InvalidPipelineConfigError
+from utils.local_cache import LocalCache
+from utils.workflow_utils import invalid_pipeline_nodes
 
+# Per-process cache in front of Redis; Redis/Mongo are only hit on a local miss
+config_cache = LocalCache(
+    "main_worker.config",
+    max_size=int(os.getenv("CONFIG_CACHE_MAX_SIZE", "1024")),
+    ttl_seconds=float(os.getenv("CONFIG_CACHE_TTL_SECONDS", "60")),
+)
 
-def get_workflow_config(org_id: str, project_id: str, pipeline_id: str):
-    mongo = MongoService()
-    redis = RedisService()
 
-    # Fetch from cache
-    workflow_config = redis.safe_get(
-        f"datanadhiserver:org:{org_id}:prj:{project_id}:pl:{pipeline_id}:workflow"
-    )
+def _pipeline_key(org_id: str, project_id: str, pipeline_id: str) -> str:
+    return f"datanadhiserver:org:{org_id}:prj:{project_id}:pl:{pipeline_id}"
 
-    if workflow_config:
-        return json.loads(workflow_config)
 
-    pipeline_nodes = mongo.db().get_collection("PipelineNodes")
+def _workflow_config_key(org_id: str, project_id: str, pipeline_id: str) -> str:
+    return f"{_pipeline_key(org_id, project_id, pipeline_id)}:workflow"
+
+
+def _validate_workflow_config(workflow_config: dict) -> dict:
+    """
+    Check a workflow config's structure as it enters the cache, so cache hits
+    skip it. Transformation function names are checked on the transformation
+    worker, where plugin functions are installed.
+
+    Raises:
+        InvalidPipelineConfigError: listing each invalid node
+    """
+    invalid = invalid_pipeline_nodes(workflow_config)
+    if invalid:
+        raise InvalidPipelineConfigError(
+            f"Invalid pipeline nodes: {', '.join(invalid)}"
+        )
+    return workflow_config
+
+
+async def _load_workflow_config(org_id: str, project_id: str, pipeline_id: str):
+    mongo = AsyncMongoService()
+
+    pipeline_nodes = (await mongo.db()).get_collection("PipelineNodes")
     nodes = pipeline_nodes.find(
         {"organisationId": org_id, "projectId": project_id, "pipelineId": pipeline_id}
     )
 
     workflow_config = {}
 
-    for node in nodes:
+    async for node in nodes:
         workflow_config[node["nodeId"]] = node["nodeConfig"]
 
-    redis.safe_set(
-        f"datanadhiserver:org:{org_id}:prj:{project_id}:pl:{pipeline_id}:workflow",
-        json.dumps(workflow_config),
-        ex=3600,
+    return workflow_config
+
+
+async def _load_pipeline(org_id: str, project_id: str, pipeline_id: str):
+    mongo = AsyncMongoService()
+
+    pipelines = (await mongo.db()).get_collection("Pipelines")
+    pipeline = await pipelines.find_one(
+        {"organisationId": org_id, "projectId": project_id, "pipelineId": pipeline_id}
     )
 
+    if not pipeline:
+        return None
+
+    del pipeline["_id"]
+    return pipeline
+
+
+async def get_workflow_config(org_id: str, project_id: str, pipeline_id: str):
+    cache_key = _workflow_config_key(org_id, project_id, pipeline_id)
+
+    # Fetch from process memory
+    workflow_config = config_cache.get(cache_key)
+    if workflow_config is not None:
+        return workflow_config
+
+    redis = AsyncRedisService()
+
+    # Fetch from cache
+    workflow_config = await redis.safe_get(cache_key)
+
+    if workflow_config:
+        workflow_config = _validate_workflow_config(json.loads(workflow_config))
+        config_cache.set(cache_key, workflow_config)
+        return workflow_config
+
+    workflow_config = await _load_workflow_config(org_id, project_id, pipeline_id)
+
+    if not workflow_config:
+        return workflow_config
+
+    _validate_workflow_config(workflow_config)
+    await redis.safe_set(cache_key, json.dumps(workflow_config), ex=3600)
+    config_cache.set(cache_key, workflow_config)
+
     return workflow_config
 
 
-def get_pipeline(org_id: str, project_id: str, pipeline_id: str):
-    mongo = MongoService()
-    redis = RedisService()
+async def get_pipeline(org_id: str, project_id: str, pipeline_id: str):
+    cache_key = _pipeline_key(org_id, project_id, pipeline_id)
+
+    # Fetch from process memory
+    pipeline = config_cache.get(cache_key)
+    if pipeline is not None:
+        return pipeline
+
+    redis = AsyncRedisService()
 
     # Fetch from cache
-    pipeline = redis.safe_get(
-        f"datanadhiserver:org:{org_id}:prj:{project_id}:pl:{pipeline_id}"
-    )
+    pipeline = await redis.safe_get(cache_key)
 
     if pipeline:
-        return json.loads(pipeline)
+        pipeline = json.loads(pipeline)
+        config_cache.set(cache_key, pipeline)
+        return pipeline
 
-    pipelines = mongo.db().get_collection("Pipelines")
-    pipeline = pipelines.find_one(
-        {"organisationId": org_id, "projectId": project_id, "pipelineId": pipeline_id}
-    )
+    pipeline = await _load_pipeline(org_id, project_id, pipeline_id)
 
-    del pipeline["_id"]
+    if not pipeline:
+        return None
 
-    redis.safe_set(
-        f"datanadhiserver:org:{org_id}:prj:{project_id}:pl:{pipeline_id}",
-        json.dumps(pipeline),
-        ex=3600,
-    )
+    await redis.safe_set(cache_key, json.dumps(pipeline), ex=3600)
+    config_cache.set(cache_key, pipeline)
 
     return pipeline
+
+
+async def get_pipeline_bundle(org_id: str, project_id: str, pipeline_id: str):
+    """
+    Fetch the pipeline and its workflow config together.
+
+    Local cache first, then a single Redis MGET for whatever is missing, then one
+    Mongo query per collection still missing (run concurrently).
+
+    Returns:
+        Tuple of (pipeline, workflow_config); either may be empty if not found
+    """
+    pipeline_key = _pipeline_key(org_id, project_id, pipeline_id)
+    workflow_key = _workflow_config_key(org_id, project_id, pipeline_id)
+    loaders = {
+        pipeline_key: _load_pipeline,
+        workflow_key: _load_workflow_config,
+    }
+    # Run on values entering the cache; raise if they're invalid
+    validators = {workflow_key: _validate_workflow_config}
+
+    # Fetch from process memory
+    found = {key: config_cache.get(key) for key in loaders}
+    missing = [key for key, value in found.items() if value is None]
+
+    if missing:
+        redis = AsyncRedisService()
+
+        # Fetch from cache in one round trip
+        for key, value in zip(missing, await redis.safe_mget(missing), strict=True):
+            if value:
+                found[key] = json.loads(value)
+                if key in validators:
+                    validators[key](found[key])
+                config_cache.set(key, found[key])
+
+        missing = [key for key in missing if found[key] is None]
+
+    if missing:
+        loaded = await asyncio.gather(
+            *(loaders[key](org_id, project_id, pipeline_id) for key in missing)
+        )
+        to_cache = {}
+        for key, value in zip(missing, loaded, strict=True):
+            found[key] = value
+            if value:
+                if key in validators:
+                    validators[key](value)
+                to_cache[key] = json.dumps(value)
+                config_cache.set(key, value)
+
+        await redis.safe_set_many(to_cache, ex=3600)
+
+    return found[pipeline_key], found[workflow_key]
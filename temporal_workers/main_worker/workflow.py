@@ -1,10 +1,18 @@
+import asyncio
 from datetime import timedelta
 
 from temporalio import workflow
 from temporalio.exceptions import ActivityError, ApplicationError
 
 from utils.retry_policies import get_default_retry_policy
-from utils.workflow_utils import extract_exception_details
+from utils.workflow_options import PIPELINE_EXECUTION_OPTIONS, get_workflow_options
+from utils.workflow_utils import (
+    CLAIM_CHECK_PATCH,
+    CONFIG_BUNDLE_PATCH,
+    execute_config_activity,
+    extract_exception_details,
+    offload_large_payload,
+)
 
 
 @workflow.defn
@@ -27,8 +35,6 @@ class MainWorkflow:
             "projectId": project_id,
             "pipelineId": pipeline_id,
             "messageId": message_id,
-            "logData": log_data,
-            "originalInput": log_data,
         }
 
         if not (org_id and project_id and pipeline_id):
@@ -38,13 +44,38 @@ class MainWorkflow:
                 "context": {"metadata": metadata},
             }
 
+        # Large records travel as a MinIO reference from here on, instead of being
+        # copied into ctx and every activity/child workflow input
+        if workflow.patched(CLAIM_CHECK_PATCH):
+            log_data = await offload_large_payload(log_data, ctx)
+        ctx["logData"] = log_data
+        ctx["originalInput"] = log_data
+
+        activity_name = "fetch_pipeline_bundle"
         try:
-            pipeline_config = await workflow.execute_activity(
-                "fetch_pipeline_config",
-                args=(org_id, project_id, pipeline_id, ctx),
-                schedule_to_close_timeout=timedelta(minutes=5),
-                retry_policy=get_default_retry_policy(),
-            )
+            if workflow.patched(CONFIG_BUNDLE_PATCH):
+                bundle = await execute_config_activity(
+                    activity_name, (org_id, project_id, pipeline_id, ctx)
+                )
+            else:
+                # Started before fetch_pipeline_bundle; replay the per-item fetches
+                activity_name = "fetch_pipeline_config"
+                bundle = {
+                    "pipeline": await workflow.execute_activity(
+                        activity_name,
+                        args=(org_id, project_id, pipeline_id, ctx),
+                        schedule_to_close_timeout=timedelta(minutes=5),
+                        retry_policy=get_default_retry_policy(),
+                    )
+                }
+                if bundle["pipeline"] and "startNodeId" in bundle["pipeline"]:
+                    activity_name = "fetch_workflow_config"
+                    bundle["workflow_config"] = await workflow.execute_activity(
+                        activity_name,
+                        args=(org_id, project_id, pipeline_id, ctx),
+                        schedule_to_close_timeout=timedelta(minutes=5),
+                        retry_policy=get_default_retry_policy(),
+                    )
         except (ApplicationError, ActivityError) as exc:
             # Log failure and return error response
             exc_type, exc_message, exc_stack = extract_exception_details(exc)
@@ -58,11 +89,14 @@ class MainWorkflow:
                     ctx,
                     None,
                     None,
-                    "MainWorkflow-fetch_pipeline_config",
+                    f"MainWorkflow-{activity_name}",
                 ),
                 schedule_to_close_timeout=timedelta(minutes=2),
             )
 
+        pipeline_config = bundle.get("pipeline")
+        workflow_config = bundle.get("workflow_config")
+
         if not pipeline_config or "startNodeId" not in pipeline_config:
             return {
                 "success": False,
@@ -70,37 +104,322 @@ class MainWorkflow:
                 "context": {"pipeline_config": pipeline_config},
             }
 
+        start_node_id = pipeline_config["startNodeId"]
+        self.node_outputs = {"input": log_data}
+
+        return await workflow.execute_child_workflow(
+            "TransformationWorkflow",
+            args=(
+                workflow_config,
+                log_data,
+                start_node_id,
+                ctx,
+                {
+                    key: pipeline_config[key]
+                    for key in PIPELINE_EXECUTION_OPTIONS
+                    if key in pipeline_config
+                },
+            ),
+            task_queue=info.task_queue + "-transform",
+            id=info.workflow_id + "-transform",
+        )
+
+
+@workflow.defn
+class BatchMainWorkflow:
+    """
+    Process many records of the same org/project/pipeline in one execution.
+
+    Input:
+        metadata: organisationId, projectId, pipelineId and optional batchId
+        records: [{messageId, log_data}], or
+        records_ref: {path, bucket} of a JSON list of such records in MinIO
+
+    Config is fetched and validated once. Records then go through transformation
+    and destination in chunks of the pipeline's batchSize, and every per-record
+    failure is logged individually.
+
+    Records given by records_ref don't enter history: chunks are passed as
+    slices of the reference and loaded by run_pipeline_batch, which also stores
+    the chunk's delivery data and failure inputs in MinIO. History still grows
+    with the batch, but by a messageId and a few small references per record.
+
+    Returns {success, records, deliveries, failures}: deliveries counts successful
+    per-target deliveries (a record sent to two targets counts twice) and
+    failures counts failures logged.
+    """
+
+    def __init__(self):
+        self.summary = {"records": 0, "deliveries": 0, "failures": 0}
+
+    @workflow.run
+    async def run(self, input: dict):
+        info = workflow.info()
+
+        metadata = input.get("metadata", {})
+
+        org_id = metadata.get("organisationId")
+        project_id = metadata.get("projectId")
+        pipeline_id = metadata.get("pipelineId")
+
+        # Build context for logging in activities
+        ctx = {
+            "organisationId": org_id,
+            "projectId": project_id,
+            "pipelineId": pipeline_id,
+            "batchId": metadata.get("batchId") or info.workflow_id,
+        }
+
+        if not (org_id and project_id and pipeline_id):
+            return {
+                "success": False,
+                "reason": "organisationId, projectId and pipelineId required",
+                "context": {"metadata": metadata},
+            }
+
+        records = input.get("records")
+        records_ref = input.get("records_ref") if records is None else None
+        if records_ref:
+            # Only the count comes back; each chunk is loaded by its activity
+            try:
+                record_count = await workflow.execute_activity(
+                    "count_batch_records",
+                    args=(records_ref, ctx),
+                    schedule_to_close_timeout=timedelta(minutes=5),
+                    retry_policy=get_default_retry_policy(),
+                )
+            except (ApplicationError, ActivityError) as exc:
+                return await self.log_failure(
+                    exc, ctx, None, "BatchMainWorkflow-count_batch_records"
+                )
+        else:
+            records = records or []
+            record_count = len(records)
+
         try:
-            workflow_config = await workflow.execute_activity(
-                "fetch_workflow_config",
-                args=(org_id, project_id, pipeline_id, ctx),
+            bundle = await execute_config_activity(
+                "fetch_pipeline_bundle", (org_id, project_id, pipeline_id, ctx)
+            )
+        except (ApplicationError, ActivityError) as exc:
+            return await self.log_failure(
+                exc, ctx, None, "BatchMainWorkflow-fetch_pipeline_bundle"
+            )
+
+        pipeline_config = bundle.get("pipeline")
+        workflow_config = bundle.get("workflow_config")
+
+        if not pipeline_config or "startNodeId" not in pipeline_config:
+            return {
+                "success": False,
+                "reason": "Start Node Id not found",
+                "context": {"pipeline_config": pipeline_config},
+            }
+
+        chunk_size = pipeline_config.get("batchSize")
+        if chunk_size is None:
+            chunk_size = get_workflow_options().batch_chunk_size
+        if (
+            isinstance(chunk_size, bool)
+            or not isinstance(chunk_size, int)
+            or chunk_size < 1
+        ):
+            return {
+                "success": False,
+                "reason": "batchSize must be a positive integer",
+                "context": {"batchSize": chunk_size},
+            }
+
+        start_node_id = pipeline_config["startNodeId"]
+        try:
+            await workflow.execute_activity(
+                "check_workflow_config",
+                args=(workflow_config, ctx),
+                task_queue=info.task_queue + "-transform",
                 schedule_to_close_timeout=timedelta(minutes=5),
                 retry_policy=get_default_retry_policy(),
             )
         except (ApplicationError, ActivityError) as exc:
-            # Log failure and return error response
-            exc_type, exc_message, exc_stack = extract_exception_details(exc)
-            return await workflow.execute_activity(
-                "log_failure",
-                args=(
-                    exc_type,
-                    exc_message,
-                    exc_stack,
-                    exc_message,
-                    ctx,
-                    None,
-                    None,
-                    "MainWorkflow-fetch_workflow_config",
-                ),
-                schedule_to_close_timeout=timedelta(minutes=2),
+            return await self.log_failure(
+                exc, ctx, None, "BatchMainWorkflow-check_workflow_config"
             )
 
-        start_node_id = pipeline_config["startNodeId"]
-        self.node_outputs = {"input": log_data}
+        self.summary = {"records": record_count, "deliveries": 0, "failures": 0}
 
-        return await workflow.execute_child_workflow(
-            "TransformationWorkflow",
-            args=(workflow_config, log_data, start_node_id, ctx),
-            task_queue=info.task_queue + "-transform",
-            id=info.workflow_id + "-transform",
+        for start in range(0, record_count, chunk_size):
+            if records_ref:
+                count = min(chunk_size, record_count - start)
+                chunk = {"records_ref": records_ref, "offset": start, "count": count}
+                record_ctxs = [
+                    {
+                        **ctx,
+                        "batchRecord": {"records_ref": records_ref, "index": index},
+                    }
+                    for index in range(start, start + count)
+                ]
+            else:
+                chunk = records[start : start + chunk_size]
+                record_ctxs = [self.record_ctx(ctx, record) for record in chunk]
+
+            await self.process_chunk(
+                chunk, record_ctxs, workflow_config, start_node_id, ctx
+            )
+
+        return {"success": True, **self.summary}
+
+    @staticmethod
+    def record_ctx(ctx: dict, record: dict) -> dict:
+        log_data = record.get("log_data", {})
+        return {
+            **ctx,
+            "messageId": record.get("messageId"),
+            "logData": log_data,
+            "originalInput": log_data,
+        }
+
+    async def log_failure(
+        self, exc: Exception, ctx: dict, current_input, activity_name: str
+    ):
+        exc_type, exc_message, exc_stack = extract_exception_details(exc)
+        return await self.log_failure_details(
+            exc_type, exc_message, exc_stack, ctx, current_input, activity_name
+        )
+
+    async def log_failure_details(
+        self,
+        exc_type: str,
+        exc_message: str,
+        exc_stack: str,
+        ctx: dict,
+        current_input,
+        activity_name: str,
+    ):
+        return await workflow.execute_activity(
+            "log_failure",
+            args=(
+                exc_type,
+                exc_message,
+                exc_stack,
+                exc_message,
+                ctx,
+                current_input,
+                None,
+                activity_name,
+            ),
+            schedule_to_close_timeout=timedelta(minutes=2),
         )
+
+    async def process_chunk(
+        self,
+        chunk: list | dict,
+        record_ctxs: list[dict],
+        workflow_config: dict,
+        start_node_id: str,
+        ctx: dict,
+    ):
+        """
+        Args:
+            chunk: Records, or a {records_ref, offset, count} slice of a batch
+                stored in MinIO, which run_pipeline_batch loads itself
+            record_ctxs: Failure-logging context for each record in the chunk
+        """
+        info = workflow.info()
+
+        try:
+            results = await workflow.execute_activity(
+                "run_pipeline_batch",
+                args=(workflow_config, chunk, start_node_id, ctx),
+                task_queue=info.task_queue + "-transform",
+                schedule_to_close_timeout=timedelta(minutes=10),
+                retry_policy=get_default_retry_policy(),
+            )
+        except (ApplicationError, ActivityError) as exc:
+            self.summary["failures"] += len(record_ctxs)
+            await asyncio.gather(
+                *(
+                    self.log_failure(
+                        exc, record_ctx, None, "BatchMainWorkflow-run_pipeline_batch"
+                    )
+                    for record_ctx in record_ctxs
+                )
+            )
+            return
+
+        failures = []
+        deliveries = {}  # target_id -> ([{messageId, data}], [record ctx])
+        for record_ctx, result in zip(record_ctxs, results, strict=True):
+            # Records of a stored batch only get their messageId from the result
+            record_ctx = {**record_ctx, "messageId": result["messageId"]}
+            for failure in result["failures"]:
+                failures.append(
+                    self.log_failure_details(
+                        failure["exc_type"],
+                        failure["exc_message"],
+                        failure["exc_stack"],
+                        record_ctx,
+                        failure["current_input"],
+                        f"BatchMainWorkflow-{failure['activity']}",
+                    )
+                )
+            for delivery in result["deliveries"]:
+                target_records, target_ctxs = deliveries.setdefault(
+                    delivery["target_id"], ([], [])
+                )
+                target_records.append(
+                    {"messageId": record_ctx["messageId"], "data": delivery["data"]}
+                )
+                target_ctxs.append(record_ctx)
+
+        self.summary["failures"] += len(failures)
+        await asyncio.gather(
+            *failures,
+            *(
+                self.send_batch(target_id, target_records, target_ctxs, ctx)
+                for target_id, (target_records, target_ctxs) in deliveries.items()
+            ),
+        )
+
+    async def send_batch(
+        self, target_id: str, records: list, record_ctxs: list, ctx: dict
+    ):
+        info = workflow.info()
+        activity_name = "BatchMainWorkflow-send_batch_to_destination"
+
+        try:
+            results = await workflow.execute_activity(
+                "send_batch_to_destination",
+                args=(records, target_id, ctx),
+                task_queue=info.task_queue + "-destination",
+                schedule_to_close_timeout=timedelta(minutes=10),
+                retry_policy=get_default_retry_policy(),
+            )
+        except (ApplicationError, ActivityError) as exc:
+            self.summary["failures"] += len(records)
+            await asyncio.gather(
+                *(
+                    self.log_failure(exc, record_ctx, record["data"], activity_name)
+                    for record, record_ctx in zip(records, record_ctxs, strict=True)
+                )
+            )
+            return
+
+        failures = []
+        for record, record_ctx, result in zip(
+            records, record_ctxs, results, strict=True
+        ):
+            if result["success"]:
+                self.summary["deliveries"] += 1
+                continue
+            error = result["error"]
+            failures.append(
+                self.log_failure_details(
+                    error["type"],
+                    error["message"],
+                    error["stack"],
+                    record_ctx,
+                    record["data"],
+                    activity_name,
+                )
+            )
+
+        self.summary["failures"] += len(failures)
+        await asyncio.gather(*failures)
@@ -1,12 +1,20 @@
-import copy
-
 from temporalio import activity
 
-from utils.exceptions import FilterEvaluationError, TransformationError
+from utils.batch_records import resolve_batch_records, store_batch_payloads
+from utils.claim_check import offload_if_large_async, resolve_claim_check
+from utils.exceptions import InvalidPipelineConfigError
 from utils.logger import log_debug
 
-from .rule_engine import RuleEngine
-from .transformations import apply_transformation
+from . import executor
+from .retention import DEFAULT_RETENTION, trim_intermediate_outputs
+from .transformations import validate_workflow_config
+
+
+async def offload_output(output_data, data, input_data, ctx: dict):
+    """Offload a large node output; an unchanged record keeps its reference."""
+    if output_data is data:
+        return input_data
+    return await offload_if_large_async(output_data, ctx)
 
 
 @activity.defn
@@ -16,52 +24,117 @@ async def transform(node_config, input_data, ctx: dict):
         ctx,
         {"transformation_fn": node_config.get("transformation_fn")},
     )
-    try:
-        transform_fn_key = node_config.get("transformation_fn")
-        transformation_params = node_config.get("transformation_params", {})
+    # Data/config errors surface as TransformationError (non-retryable); anything
+    # else (e.g. network issues) propagates for retry
+    data = await resolve_claim_check(input_data)
+    next_nodes, output_data = executor.run_transformation_node(node_config, data)
+    return next_nodes, await offload_output(output_data, data, input_data, ctx)
 
-        output_data = apply_transformation(
-            transform_fn_key, transformation_params, copy.deepcopy(input_data)
-        )
 
-        return node_config.get("next", []), output_data
-    except (ValueError, KeyError, TypeError) as exc:
-        # These are data/config errors - wrap in our custom exception
-        raise TransformationError(f"Transformation failed: {str(exc)}") from exc
-    except Exception:
-        # Other exceptions could be retryable (e.g., network issues)
-        # Let them propagate for retry
-        raise
+@activity.defn
+async def transform_chain(node_config, input_data, ctx: dict):
+    log_debug(
+        "Applying transformation chain",
+        ctx,
+        {"operation_count": len(node_config.get("operations", []))},
+    )
+    # Data/config errors surface as TransformationError (non-retryable)
+    data = await resolve_claim_check(input_data)
+    next_nodes, output_data = executor.run_chain_node(node_config, data)
+    return next_nodes, await offload_output(output_data, data, input_data, ctx)
 
 
 @activity.defn
 async def filters(node_config, input_data, ctx: dict):
     log_debug("Evaluating filters", ctx)
-    try:
-        next = []
-        filters = node_config.get("filters", {})
-
-        # Evaluate each filter independently (non-exclusive)
-        for _, filter_config in filters.items():
-            if "filter" not in filter_config:
-                if filter_config.get("next") is not None:
-                    for nd in filter_config.get("next", []):
-                        next.append(nd)
-            else:
-                # Evaluate specific filter conditions
-                filter_condition = filter_config["filter"]
-                if filter_condition and RuleEngine(input_data).evaluate_filter(
-                    filter_condition
-                ):
-                    # Add next nodes for this filter to queue
-                    if filter_config.get("next"):
-                        for nd in filter_config.get("next", []):
-                            next.append(nd)
-
-        return next, copy.deepcopy(input_data)
-    except (ValueError, KeyError, TypeError, AttributeError) as exc:
-        # These are data/config errors - wrap in our custom exception
-        raise FilterEvaluationError(f"Filter evaluation failed: {str(exc)}") from exc
-    except Exception:
-        # Other exceptions could be retryable
-        raise
+    # Data/config errors surface as FilterEvaluationError (non-retryable); anything
+    # else propagates for retry
+    next_nodes, _ = executor.run_filter_node(
+        node_config, await resolve_claim_check(input_data)
+    )
+    # Filters don't change the record, so pass on the input (or its reference)
+    return next_nodes, input_data
+
+
+async def offload_inline_result(result: dict, ctx: dict, offloaded: dict) -> dict:
+    """
+    Offload large records in a run_pipeline_inline result, each object once.
+
+    offloaded maps id(record) -> value to send instead, pre-seeded with the input.
+    """
+
+    async def offload(data):
+        if id(data) not in offloaded:
+            offloaded[id(data)] = await offload_if_large_async(data, ctx)
+        return offloaded[id(data)]
+
+    for outputs in result["node_outputs"].values():
+        for index, output in enumerate(outputs):
+            outputs[index] = await offload(output)
+    for delivery in result["deliveries"]:
+        delivery["data"] = await offload(delivery["data"])
+    for failure in result["failures"]:
+        failure["current_input"] = await offload(failure["current_input"])
+    return result
+
+
+@activity.defn
+async def run_pipeline_inline(
+    workflow_config: dict,
+    input_data,
+    start_node_id: str,
+    ctx: dict,
+    retention: str = DEFAULT_RETENTION,
+) -> dict:
+    log_debug(
+        "Running pipeline inline",
+        ctx,
+        {"start_node_id": start_node_id, "node_count": len(workflow_config)},
+    )
+    data = await resolve_claim_check(input_data)
+    result = executor.run_pipeline_inline(workflow_config, data, start_node_id)
+    # Trim before offloading, so dropped outputs are never uploaded
+    result["node_outputs"] = trim_intermediate_outputs(
+        result["node_outputs"], workflow_config, retention
+    )
+    # Records the pipeline didn't change keep the reference they came in with
+    return await offload_inline_result(result, ctx, {id(data): input_data})
+
+
+@activity.defn
+async def check_workflow_config(workflow_config: dict, ctx: dict):
+    """
+    Validate a workflow config against the transformations of this worker.
+
+    Function names are only known here, where plugins are installed, so
+    BatchMainWorkflow runs this once before any record reaches a node that can't
+    run.
+    """
+    if not isinstance(workflow_config, dict):
+        raise InvalidPipelineConfigError("Workflow config not found")
+    log_debug("Validating workflow config", ctx, {"node_count": len(workflow_config)})
+    validate_workflow_config(workflow_config)
+
+
+@activity.defn
+async def run_pipeline_batch(
+    workflow_config: dict, records: list[dict] | dict, start_node_id: str, ctx: dict
+) -> list[dict]:
+    """
+    Args:
+        records: [{messageId, log_data}], or a {records_ref, offset, count} slice
+            of a batch stored in MinIO, loaded here. For a slice, delivery data
+            and failure inputs are stored in MinIO too and returned as
+            {records_ref, index} references.
+    """
+    stored = isinstance(records, dict)
+    records = await resolve_batch_records(records)
+    log_debug(
+        "Running pipeline for record batch",
+        ctx,
+        {"start_node_id": start_node_id, "record_count": len(records)},
+    )
+    results = executor.run_pipeline_batch(workflow_config, records, start_node_id)
+    if stored:
+        return await store_batch_payloads(results, ctx)
+    return results
@@ -0,0 +1,307 @@
+"""
+Node execution shared by the per-node activities and the inline pipeline runner.
+"""
+
+import traceback
+from typing import Any
+
+from utils.exceptions import (
+    DataNadhiError,
+    FilterEvaluationError,
+    InvalidPipelineConfigError,
+    TransformationError,
+)
+from utils.workflow_utils import end_node_targets
+
+from .rule_engine import BatchRuleEngine, get_compiled_filter
+from .transformations import apply_transformation, get_compiled_chain
+
+
+def run_transformation_node(node_config: dict, input_data: Any) -> tuple[list, Any]:
+    """Apply a transformation node. Returns (next node ids, output data)."""
+    try:
+        transform_fn_key = node_config.get("transformation_fn")
+        transformation_params = node_config.get("transformation_params", {})
+
+        # Transformations never mutate their input, so records can be shared
+        output_data = apply_transformation(
+            transform_fn_key, transformation_params, input_data
+        )
+
+        return node_config.get("next", []), output_data
+    except (ValueError, KeyError, TypeError) as exc:
+        # These are data/config errors - wrap in our custom exception
+        raise TransformationError(f"Transformation failed: {str(exc)}") from exc
+
+
+def run_chain_node(node_config: dict, input_data: Any) -> tuple[list, Any]:
+    """Apply a transformation-chain node. Returns (next node ids, output data)."""
+    try:
+        apply_chain = get_compiled_chain(node_config.get("operations", []))
+        return node_config.get("next", []), apply_chain(input_data)
+    except (ValueError, KeyError, TypeError) as exc:
+        # These are data/config errors - wrap in our custom exception
+        raise TransformationError(f"Transformation chain failed: {str(exc)}") from exc
+
+
+def run_filter_node(node_config: dict, input_data: Any) -> tuple[list, Any]:
+    """Evaluate a condition-branching node. Returns (next node ids, output data)."""
+    try:
+        next = []
+        filters = node_config.get("filters", {})
+
+        # Evaluate each filter independently (non-exclusive)
+        for _, filter_config in filters.items():
+            if "filter" not in filter_config:
+                if filter_config.get("next") is not None:
+                    for nd in filter_config.get("next", []):
+                        next.append(nd)
+            else:
+                # Evaluate specific filter conditions
+                filter_condition = filter_config["filter"]
+                if filter_condition and get_compiled_filter(filter_condition)(
+                    input_data
+                ):
+                    # Add next nodes for this filter to queue
+                    if filter_config.get("next"):
+                        for nd in filter_config.get("next", []):
+                            next.append(nd)
+
+        return next, input_data
+    except (ValueError, KeyError, TypeError, AttributeError) as exc:
+        # These are data/config errors - wrap in our custom exception
+        raise FilterEvaluationError(f"Filter evaluation failed: {str(exc)}") from exc
+
+
+NODE_RUNNERS = {
+    "transformation": (run_transformation_node, "transform"),
+    "transformation-chain": (run_chain_node, "transform_chain"),
+    "condition-branching": (run_filter_node, "filters"),
+}
+
+
+def _failure_result(exc: Exception) -> dict:
+    """Same shape log_failure returns, so node outputs match per-node execution."""
+    return {
+        "success": False,
+        "reason": str(exc),
+        "error": {"type": type(exc).__name__, "message": str(exc)},
+    }
+
+
+def run_pipeline_inline(
+    workflow_config: dict, input_data: Any, start_node_id: str
+) -> dict:
+    """
+    Walk the whole pipeline graph in-process with TransformationWorkflow semantics.
+
+    Nodes are visited breadth-first in the same order the workflow would schedule
+    them. Data/config errors (DataNadhiError) stop that branch and are reported in
+    "failures" for the workflow to log; any other exception propagates so the
+    caller can fall back to per-node activities with their own retries.
+
+    Returns:
+        Dict with:
+            node_outputs: {node_id: [output, ...]}, with None placeholders for end
+                nodes until the workflow fills in the destination results
+            deliveries: [{node_id, index, target_ids, data}] for each end node hit
+            failures: [{node_id, activity, exc_type, exc_message, exc_stack,
+                current_input}] for each failed node
+    """
+    node_outputs: dict[str, list] = {}
+    deliveries = []
+    failures = []
+    queue = [(start_node_id, input_data)]
+
+    while queue:
+        node_id, data = queue.pop(0)
+        node_config = workflow_config.get(node_id)
+        if node_config is None:
+            raise InvalidPipelineConfigError(f"Node not found in pipeline: {node_id}")
+
+        node_type = node_config.get("type")
+        outputs = node_outputs.setdefault(node_id, [])
+
+        next_nodes, final_data = [], data
+        if node_type in NODE_RUNNERS:
+            runner, activity_name = NODE_RUNNERS[node_type]
+            try:
+                next_nodes, final_data = runner(node_config, data)
+            except DataNadhiError as exc:
+                final_data = _failure_result(exc)
+                failures.append(
+                    {
+                        "node_id": node_id,
+                        "activity": activity_name,
+                        "exc_type": type(exc).__name__,
+                        "exc_message": str(exc),
+                        "exc_stack": traceback.format_exc(),
+                        "current_input": data,
+                    }
+                )
+        elif node_type == "end":
+            deliveries.append(
+                {
+                    "node_id": node_id,
+                    "index": len(outputs),
+                    "target_ids": end_node_targets(node_config),
+                    "data": data,
+                }
+            )
+            final_data = None
+
+        for nd in next_nodes:
+            queue.append((nd, final_data))
+
+        outputs.append(final_data)
+
+    return {
+        "node_outputs": node_outputs,
+        "deliveries": deliveries,
+        "failures": failures,
+    }
+
+
+def _abort_failure(exc: Exception, log_data: Any) -> dict:
+    """Failure entry for an error that stops a whole record in a batch."""
+    return {
+        "node_id": None,
+        "activity": "run_pipeline_batch",
+        "exc_type": type(exc).__name__,
+        "exc_message": str(exc),
+        "exc_stack": traceback.format_exc(),
+        "current_input": log_data,
+    }
+
+
+def _route_filter_batch(node_config: dict, group: list[tuple]) -> list[tuple]:
+    """
+    Route a group of (record index, data) through a condition-branching node.
+
+    Returns (next node id, sub-group) pairs in the order a per-record run would
+    queue them. Raises if the batch can't be evaluated vectorized.
+    """
+    filters = node_config.get("filters", {})
+    routes = BatchRuleEngine([data for _, data in group]).route(filters)
+
+    next_groups = []
+    for name, filter_config in filters.items():
+        selected = [group[i] for i in routes[name]]
+        if not selected:
+            continue
+        for nd in filter_config.get("next") or []:
+            next_groups.append((nd, selected))
+    return next_groups
+
+
+def run_pipeline_batch(
+    workflow_config: dict, records: list[dict], start_node_id: str
+) -> list[dict]:
+    """
+    Run the pipeline over a batch of records, a node at a time.
+
+    Records travel through the graph in groups, so each condition-branching node
+    evaluates its filters once per group with BatchRuleEngine instead of once per
+    record. Deliveries and failures for each record come out in the same order as
+    running run_pipeline_inline on it alone.
+
+    Any error is contained to its record so one bad record can't fail the batch.
+
+    Args:
+        records: [{messageId, log_data}]
+
+    Returns:
+        One entry per record: {messageId, deliveries, failures}. Failures have the
+        same shape as in run_pipeline_inline; deliveries are split per target, as
+        {node_id, index, target_id, data}
+    """
+    results = [
+        {"messageId": record.get("messageId"), "deliveries": [], "failures": []}
+        for record in records
+    ]
+    log_data = [record.get("log_data", {}) for record in records]
+    visits: dict[int, dict[str, int]] = {}  # record index -> node id -> outputs
+    aborted = set()
+
+    def abort(index: int, exc: Exception):
+        # Same outcome as run_pipeline_inline raising for this record on its own
+        aborted.add(index)
+        results[index]["deliveries"] = []
+        results[index]["failures"] = [_abort_failure(exc, log_data[index])]
+
+    queue = [(start_node_id, list(enumerate(log_data)))]
+    while queue:
+        node_id, group = queue.pop(0)
+        group = [(index, data) for index, data in group if index not in aborted]
+        if not group:
+            continue
+
+        node_config = workflow_config.get(node_id)
+        if node_config is None:
+            error = InvalidPipelineConfigError(f"Node not found in pipeline: {node_id}")
+            for index, _ in group:
+                abort(index, error)
+            continue
+
+        node_type = node_config.get("type")
+        if node_type == "condition-branching":
+            try:
+                queue.extend(_route_filter_batch(node_config, group))
+                continue
+            except Exception:
+                # Any error (including NumPy ones such as OverflowError): fall
+                # through to per-record evaluation, which attributes it to the
+                # records that actually hit it
+                pass
+
+        # Keyed by (position in the record's next list, node id), so every record
+        # still queues its next nodes in its own order
+        next_groups: dict[tuple[int, str], list] = {}
+        for index, data in group:
+            counts = visits.setdefault(index, {})
+            output_index = counts.get(node_id, 0)
+            counts[node_id] = output_index + 1
+
+            if node_type in NODE_RUNNERS:
+                runner, activity_name = NODE_RUNNERS[node_type]
+                try:
+                    next_nodes, final_data = runner(node_config, data)
+                except DataNadhiError as exc:
+                    results[index]["failures"].append(
+                        {
+                            "node_id": node_id,
+                            "activity": activity_name,
+                            "exc_type": type(exc).__name__,
+                            "exc_message": str(exc),
+                            "exc_stack": traceback.format_exc(),
+                            "current_input": data,
+                        }
+                    )
+                    continue
+                except Exception as exc:
+                    abort(index, exc)
+                    continue
+                for position, nd in enumerate(next_nodes):
+                    next_groups.setdefault((position, nd), []).append(
+                        (index, final_data)
+                    )
+            elif node_type == "end":
+                try:
+                    target_ids = end_node_targets(node_config)
+                except (KeyError, TypeError) as exc:
+                    abort(index, exc)
+                    continue
+                results[index]["deliveries"].extend(
+                    {
+                        "node_id": node_id,
+                        "index": output_index,
+                        "target_id": target_id,
+                        "data": data,
+                    }
+                    for target_id in target_ids
+                )
+
+        for position, nd in sorted(next_groups, key=lambda key: key[0]):
+            queue.append((nd, next_groups[(position, nd)]))
+
+    return results
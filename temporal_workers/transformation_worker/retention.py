@@ -0,0 +1,67 @@
+"""
+How much of node_outputs a TransformationWorkflow keeps in its result.
+
+Modes (pipeline option "nodeOutputRetention"):
+    full       every node's outputs (default)
+    end-nodes  only end nodes, i.e. destination results
+    summary    every node, with each output replaced by {"sha256", "size"}
+    none       no node outputs
+
+Safe to import in workflows.
+"""
+
+import hashlib
+import json
+from typing import Any
+
+from utils.claim_check import CLAIM_CHECK_KEY, is_claim_check
+
+RETENTION_MODES = ("none", "end-nodes", "summary", "full")
+DEFAULT_RETENTION = "full"
+
+
+def summarize_output(output: Any) -> dict:
+    """sha256 and size of an output's compact, key-sorted JSON."""
+    if is_claim_check(output):
+        # Same encoding as the offloaded object, so no need to load it
+        ref = output[CLAIM_CHECK_KEY]
+        return {"sha256": ref["sha256"], "size": ref["size"]}
+    encoded = json.dumps(output, separators=(",", ":"), sort_keys=True).encode()
+    return {"sha256": hashlib.sha256(encoded).hexdigest(), "size": len(encoded)}
+
+
+def _is_end_node(workflow_config: dict, node_id: str) -> bool:
+    return (workflow_config.get(node_id) or {}).get("type") == "end"
+
+
+def _retain(outputs: list, mode: str, keep_as_is: bool) -> list | None:
+    if keep_as_is:
+        return outputs
+    if mode == "summary":
+        return [summarize_output(output) for output in outputs]
+    return None
+
+
+def trim_intermediate_outputs(
+    node_outputs: dict, workflow_config: dict, mode: str
+) -> dict:
+    """Apply mode to every node except end nodes."""
+    trimmed = {}
+    for node_id, outputs in node_outputs.items():
+        end_node = _is_end_node(workflow_config, node_id)
+        outputs = _retain(outputs, mode, end_node or mode == "full")
+        if outputs is not None:
+            trimmed[node_id] = outputs
+    return trimmed
+
+
+def trim_end_outputs(node_outputs: dict, workflow_config: dict, mode: str) -> dict:
+    """Apply mode to end nodes only."""
+    trimmed = {}
+    for node_id, outputs in node_outputs.items():
+        end_node = _is_end_node(workflow_config, node_id)
+        keep = not end_node or mode in ("full", "end-nodes")
+        outputs = _retain(outputs, mode, keep)
+        if outputs is not None:
+            trimmed[node_id] = outputs
+    return trimmed
@@ -1,95 +1,277 @@
-import copy
+import json
+import operator as op
+from collections.abc import Callable
+from functools import lru_cache
 from typing import Any
 
-from .utils import _is_keychain_str, get_keychain_from_str
+import numpy as np
 
+from utils.keypath import compile_getter
 
-class RuleEngine:
-    def __init__(self, data):
-        self.data = data
+from .utils import _is_keychain_str
 
-    def get_value_from_data(self, key: str) -> Any:
-        """Extract value from data using keychain or direct key"""
-        if _is_keychain_str(key):
-            keys = get_keychain_from_str(key)
-            current = copy.deepcopy(self.data)
-            for k in keys:
-                if isinstance(current, dict) and k in current:
-                    current = current[k]
-                else:
-                    return None
-            return current
-        return self.data.get(key)
+Predicate = Callable[[Any], bool]
+Accessor = Callable[[Any], Any]
 
-    def evaluate_check(self, check: dict) -> bool:
-        """Evaluate a single check condition"""
-        key = check.get("key")
-        value = check.get("value")
-        operator = check.get("operator")
 
-        # Get actual values from data
-        key_value = self.get_value_from_data(key)
+def _both_present(compare: Callable[[Any, Any], bool]) -> Callable[[Any, Any], bool]:
+    """Ordering comparisons are False when either side is missing."""
 
-        # Handle value - it could be a keychain reference or literal value
-        if value and isinstance(value, str) and _is_keychain_str(value):
-            compare_value = self.get_value_from_data(value)
-        else:
-            compare_value = value
+    def compare_present(key_value, compare_value):
+        return (
+            key_value is not None
+            and compare_value is not None
+            and compare(key_value, compare_value)
+        )
 
-        if operator == "exists":
-            return key_value is not None
-        if operator == "not_exists":
-            return key_value is None
-        # Perform comparison based on operator
-        if operator == "et":  # equal to
-            return key_value == compare_value
-        if operator == "gte":  # greater than or equal
-            return (
-                key_value is not None
-                and compare_value is not None
-                and key_value >= compare_value
-            )
-        if operator == "gt":  # greater than
-            return (
-                key_value is not None
-                and compare_value is not None
-                and key_value > compare_value
+    return compare_present
+
+
+# operator -> fn(key_value, compare_value)
+OPERATORS: dict[str, Callable[[Any, Any], bool]] = {
+    "exists": lambda key_value, _: key_value is not None,
+    "not_exists": lambda key_value, _: key_value is None,
+    "et": op.eq,  # equal to
+    "ne": op.ne,  # not equal
+    "gte": _both_present(op.ge),  # greater than or equal
+    "gt": _both_present(op.gt),  # greater than
+    "lte": _both_present(op.le),  # less than or equal
+    "lt": _both_present(op.lt),  # less than
+}
+
+
+def compile_accessor(key: Any) -> Accessor:
+    """Compile a keychain ($.a.b) or direct key into a value getter."""
+    if not _is_keychain_str(key):
+        return lambda data: data.get(key)
+    return compile_getter(key)
+
+
+def compile_check(check: dict) -> Predicate:
+    """Compile a single check condition into a predicate over the record."""
+    key = check.get("key")
+    value = check.get("value")
+    compare = OPERATORS.get(check.get("operator"))
+    if compare is None:
+        return lambda data: False
+
+    get_key = compile_accessor(key)
+
+    # Value could be a keychain reference or literal value
+    if value and isinstance(value, str) and _is_keychain_str(value):
+        get_value = compile_accessor(value)
+        return lambda data: compare(get_key(data), get_value(data))
+    return lambda data: compare(get_key(data), value)
+
+
+def compile_filter(filter: Any) -> Predicate:
+    """Compile nested and/or/check conditions into a predicate over the record."""
+    if not isinstance(filter, dict):
+        return lambda data: False
+    if "and" in filter:
+        # All conditions must be true; an empty list passes
+        conditions = tuple(compile_filter(c) for c in filter["and"])
+        return lambda data: all(condition(data) for condition in conditions)
+    if "or" in filter:
+        # At least one condition must be true; an empty list passes
+        conditions = tuple(compile_filter(c) for c in filter["or"])
+        if not conditions:
+            return lambda data: True
+        return lambda data: any(condition(data) for condition in conditions)
+    if "check" in filter:
+        return compile_check(filter["check"])
+    return lambda data: False
+
+
+@lru_cache(maxsize=4096)
+def _compile_canonical(canonical_filter: str) -> Predicate:
+    return compile_filter(json.loads(canonical_filter))
+
+
+def get_compiled_filter(filter: dict) -> Predicate:
+    """Compiled predicate for a filter, cached by its canonical definition."""
+    return _compile_canonical(json.dumps(filter, sort_keys=True))
+
+
+# Ints beyond this lose precision as float64, so those columns stay in Python
+_MAX_EXACT_FLOAT_INT = 2**53
+
+# operator -> vectorized fn(left array, right array or scalar)
+NUMPY_OPERATORS: dict[str, Callable[[Any, Any], np.ndarray]] = {
+    "et": np.equal,
+    "ne": np.not_equal,
+    "gte": np.greater_equal,
+    "gt": np.greater,
+    "lte": np.less_equal,
+    "lt": np.less,
+}
+
+
+def _is_number(value: Any) -> bool:
+    # bool is an int subclass but must not be compared as a number here
+    if type(value) is int:
+        return -_MAX_EXACT_FLOAT_INT <= value <= _MAX_EXACT_FLOAT_INT
+    return type(value) is float
+
+
+def _is_string(value: Any) -> bool:
+    # NumPy unicode arrays drop trailing NULs, which would change comparisons
+    return type(value) is str and not value.endswith("\x00")
+
+
+class Column:
+    """Values of one key across a batch of records, with a null (missing) mask."""
+
+    def __init__(self, values: list):
+        self.values = values
+        self.nulls = np.fromiter((v is None for v in values), bool, len(values))
+        present = [v for v in values if v is not None]
+
+        # Typed arrays for vectorized comparisons; nulls are filled and masked out
+        self.numbers = None
+        self.strings = None
+        if present and all(_is_number(v) for v in present):
+            self.numbers = np.array(
+                [0.0 if v is None else v for v in values], dtype=np.float64
             )
-        if operator == "lte":  # less than or equal
-            return (
-                key_value is not None
-                and compare_value is not None
-                and key_value <= compare_value
+        elif present and all(_is_string(v) for v in present):
+            self.strings = np.array(["" if v is None else v for v in values], dtype=str)
+
+    def typed_for(self, value: Any) -> np.ndarray | None:
+        """Typed array comparable with value, or None if Python semantics are needed."""
+        if self.numbers is not None and _is_number(value):
+            return self.numbers
+        if self.strings is not None and _is_string(value):
+            return self.strings
+        return None
+
+
+class BatchRuleEngine:
+    """
+    Evaluate filters over a batch of records at once.
+
+    Each referenced key is extracted once into a Column, and checks and and/or trees
+    are evaluated as boolean masks with the same semantics as compile_filter. Columns
+    of numbers or strings are compared with NumPy; anything else falls back to the
+    scalar operators element by element.
+
+    Unlike a compiled filter, every branch of an and/or tree is evaluated, so an
+    error can surface for a record whose result wouldn't have needed that branch.
+    Callers should fall back to per-record evaluation when this raises.
+    """
+
+    def __init__(self, records: list):
+        self.records = records
+        self.size = len(records)
+        self.columns: dict[Any, Column] = {}
+
+    def column(self, key: Any) -> Column:
+        if key not in self.columns:
+            get_key = compile_accessor(key)
+            self.columns[key] = Column([get_key(record) for record in self.records])
+        return self.columns[key]
+
+    def _fill(self, value: bool) -> np.ndarray:
+        return np.full(self.size, value, dtype=bool)
+
+    def _compare_literal(self, operator: str, column: Column, value: Any):
+        if value is None:
+            if operator == "et":
+                return column.nulls.copy()
+            if operator == "ne":
+                return ~column.nulls
+            # Ordering comparisons are False when either side is missing
+            return self._fill(False)
+
+        typed = column.typed_for(value)
+        if typed is None:
+            compare = OPERATORS[operator]
+            return np.fromiter(
+                (compare(v, value) for v in column.values), bool, self.size
             )
-        if operator == "lt":  # less than
-            return (
-                key_value is not None
-                and compare_value is not None
-                and key_value < compare_value
+        mask = NUMPY_OPERATORS[operator](typed, value)
+        # A missing key is never equal to a present value
+        if operator == "ne":
+            return mask | column.nulls
+        return mask & ~column.nulls
+
+    def _compare_columns(self, operator: str, left: Column, right: Column):
+        if left.numbers is not None and right.numbers is not None:
+            typed = left.numbers, right.numbers
+        elif left.strings is not None and right.strings is not None:
+            typed = left.strings, right.strings
+        else:
+            compare = OPERATORS[operator]
+            return np.fromiter(
+                (compare(a, b) for a, b in zip(left.values, right.values, strict=True)),
+                bool,
+                self.size,
             )
-        if operator == "ne":  # not equal
-            return key_value != compare_value
-        return False
 
-    def evaluate_filter(self, filter: dict) -> bool:
-        """Evaluate filter conditions with AND/OR logic"""
+        present = ~left.nulls & ~right.nulls
+        if operator in ("et", "ne"):
+            # None == None, so two missing values are equal
+            equal = (np.equal(*typed) & present) | (left.nulls & right.nulls)
+            return equal if operator == "et" else ~equal
+        return NUMPY_OPERATORS[operator](*typed) & present
+
+    def evaluate_check(self, check: dict) -> np.ndarray:
+        """Evaluate a single check condition. Returns a boolean mask."""
+        key = check.get("key")
+        value = check.get("value")
+        operator = check.get("operator")
+        if operator not in OPERATORS:
+            return self._fill(False)
+
+        column = self.column(key)
+        if operator == "exists":
+            return ~column.nulls
+        if operator == "not_exists":
+            return column.nulls.copy()
+
+        # Value could be a keychain reference or literal value
+        if value and isinstance(value, str) and _is_keychain_str(value):
+            return self._compare_columns(operator, column, self.column(value))
+        return self._compare_literal(operator, column, value)
+
+    def evaluate_filter(self, filter: Any) -> np.ndarray:
+        """Evaluate nested and/or/check conditions. Returns a boolean mask."""
+        if not isinstance(filter, dict):
+            return self._fill(False)
         if "and" in filter:
-            if len(filter["and"]) == 0:
-                return True
-            # All conditions must be true
-            result = True
+            # All conditions must be true; an empty list passes
+            mask = self._fill(True)
             for condition in filter["and"]:
-                result = result and self.evaluate_filter(condition)
-            return result
+                mask &= self.evaluate_filter(condition)
+            return mask
         if "or" in filter:
-            if len(filter["or"]) == 0:
-                return True
-            result = False
-            # At least one condition must be true
+            # At least one condition must be true; an empty list passes
+            if not filter["or"]:
+                return self._fill(True)
+            mask = self._fill(False)
             for condition in filter["or"]:
-                result = result or self.evaluate_filter(condition)
-            return result
+                mask |= self.evaluate_filter(condition)
+            return mask
         if "check" in filter:
-            # Single check condition
             return self.evaluate_check(filter["check"])
-        return False
+        return self._fill(False)
+
+    def route(self, filters: dict) -> dict[str, np.ndarray]:
+        """
+        Evaluate the filters of a condition-branching node.
+
+        Returns:
+            {filter name: indices of the records routed to that filter's next
+            nodes}. Filters without a "filter" condition route every record.
+        """
+        routes = {}
+        for name, filter_config in filters.items():
+            if "filter" not in filter_config:
+                routes[name] = np.arange(self.size)
+                continue
+            filter_condition = filter_config["filter"]
+            if not filter_condition:
+                routes[name] = np.arange(0)
+                continue
+            routes[name] = np.flatnonzero(self.evaluate_filter(filter_condition))
+        return routes
@@ -1,3 +1,12 @@
+from .chain import compile_chain, get_compiled_chain
 from .core import Transformation, apply_transformation
+from .registry import TransformationRegistry, validate_workflow_config
 
-__all__ = ["Transformation", "apply_transformation"]
+__all__ = [
+    "Transformation",
+    "TransformationRegistry",
+    "apply_transformation",
+    "compile_chain",
+    "get_compiled_chain",
+    "validate_workflow_config",
+]
@@ -0,0 +1,322 @@
+"""
+Transformation chains: an ordered list of key operations applied as one node.
+
+Operations are compiled into a trie of the paths they touch, and the record is
+walked once per trie: each trie node applies its operations (in chain order) to
+the dict at that path, then descends into its children. Only the dicts along
+visited paths are copied; everything else is shared with the input record.
+
+A walk applies ancestors before descendants, so an operation that touches a
+subtree already changed by an earlier operation in the chain starts a new trie.
+move_key reads and writes two unrelated paths, and operations on paths through
+lists ("[0]", "[*]") go through utils.keypath, so both run as their own step.
+Typical chains (removing or masking many fields) compile into a single walk.
+
+Supported operations:
+    {"op": "add_key", "key": "$.a.b", "value": ...}
+    {"op": "remove_key", "key": "$.a.b"}
+    {"op": "rename_key", "key": "$.a.b", "to": "c"}  # new name, same parent
+    {"op": "move_key", "key": "$.a.b", "to": "$.c.d"}
+    {"op": "select_keys", "key": "$.a", "keys": ["x", "y"]}  # key defaults to root
+    {"op": "flatten", "key": "$.a", "separator": "."}  # key defaults to root
+    {"op": "cast", "key": "$.a.b", "type": "int" | "float" | "str" | "bool"}
+"""
+
+import json
+from collections.abc import Callable
+from functools import lru_cache
+from typing import Any
+
+from utils.exceptions import InvalidTransformationError
+from utils.keypath import (
+    WILDCARD,
+    delete_in,
+    get_in,
+    is_keypath,
+    parse_keypath,
+    set_in,
+    update_in,
+)
+
+# Matches any child key when checking whether operations conflict
+ALL_KEYS = None
+
+_MISSING = object()
+
+OPERATIONS = (
+    "add_key",
+    "remove_key",
+    "rename_key",
+    "move_key",
+    "select_keys",
+    "flatten",
+    "cast",
+)
+
+Action = Callable[[dict], dict]
+Step = Callable[[dict], dict]
+
+
+def _path(key: Any) -> tuple:
+    if not is_keypath(key):
+        return (key,)
+    try:
+        return parse_keypath(key)
+    except ValueError as exc:
+        raise InvalidTransformationError(str(exc)) from exc
+
+
+def _dict_keys_only(path: tuple) -> bool:
+    return not any(type(k) is int or k is WILDCARD for k in path)
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in ("true", "1", "yes"):
+            return True
+        if lowered in ("false", "0", "no", ""):
+            return False
+        raise ValueError(f"Cannot cast {value!r} to bool")
+    return bool(value)
+
+
+CASTS: dict[str, Callable[[Any], Any]] = {
+    "int": int,
+    "float": float,
+    "str": str,
+    "bool": _to_bool,
+}
+
+
+def flatten_dict(data: dict, separator: str = ".", prefix: str = "") -> dict:
+    """Flatten nested dicts into one level, joining keys with separator."""
+    flat = {}
+    for key, value in data.items():
+        flat_key = f"{prefix}{separator}{key}" if prefix else str(key)
+        if isinstance(value, dict) and value:
+            flat.update(flatten_dict(value, separator, flat_key))
+        else:
+            flat[flat_key] = value
+    return flat
+
+
+class _Trie:
+    __slots__ = ("actions", "children", "creates")
+
+    def __init__(self):
+        self.actions: list[Action] = []
+        self.children: dict[Any, _Trie] = {}
+        self.creates = False  # An operation below needs this path to exist
+
+    def node_at(self, location: tuple, creates: bool) -> "_Trie":
+        trie = self
+        for key in location:
+            trie = trie.children.setdefault(key, _Trie())
+            trie.creates = trie.creates or creates
+        return trie
+
+    def run(self, node: dict) -> dict:
+        """Apply to node, which must already be a private copy."""
+        for action in self.actions:
+            node = action(node)
+        for key, child_trie in self.children.items():
+            child = node.get(key)
+            if isinstance(child, dict):
+                child = dict(child)
+            elif child_trie.creates:
+                # Same as set_in: missing or non-dict intermediates become dicts
+                child = {}
+            else:
+                continue
+            node[key] = child_trie.run(child)
+        return node
+
+
+def _required(operation: dict, field: str) -> Any:
+    if field not in operation:
+        raise InvalidTransformationError(
+            f"Chain operation {operation.get('op')!r} requires {field!r}"
+        )
+    return operation[field]
+
+
+def _compile_operation(operation: dict) -> tuple[tuple, Any, bool, Action]:
+    """Returns (location, touched child keys, creates path, action)."""
+    op = operation.get("op")
+
+    if op in ("select_keys", "flatten"):
+        location = _path(operation["key"]) if "key" in operation else ()
+        if op == "select_keys":
+            keys = tuple(_required(operation, "keys"))
+
+            def select(node: dict) -> dict:
+                return {k: node[k] for k in keys if k in node}
+
+            return location, ALL_KEYS, False, select
+
+        separator = operation.get("separator", ".")
+        return location, ALL_KEYS, False, lambda node: flatten_dict(node, separator)
+
+    path = _path(_required(operation, "key"))
+    location, name = path[:-1], path[-1]
+
+    if op == "add_key":
+        value = operation.get("value")
+
+        def add(node: dict) -> dict:
+            node[name] = value
+            return node
+
+        return location, {name}, True, add
+
+    if op == "remove_key":
+
+        def remove(node: dict) -> dict:
+            node.pop(name, None)
+            return node
+
+        return location, {name}, False, remove
+
+    if op == "rename_key":
+        new_name = _required(operation, "to")
+
+        def rename(node: dict) -> dict:
+            if name in node:
+                node[new_name] = node.pop(name)
+            return node
+
+        return location, {name, new_name}, False, rename
+
+    if op == "cast":
+        type_name = _required(operation, "type")
+        if type_name not in CASTS:
+            raise InvalidTransformationError(f"Unsupported cast type: {type_name}")
+        cast_fn = CASTS[type_name]
+
+        def cast(node: dict) -> dict:
+            if node.get(name) is not None:
+                node[name] = cast_fn(node[name])
+            return node
+
+        return location, {name}, False, cast
+
+    raise InvalidTransformationError(f"Unsupported chain operation: {op}")
+
+
+def _compile_move(operation: dict) -> Step:
+    source = _path(_required(operation, "key"))
+    target = _path(_required(operation, "to"))
+
+    def move(record: dict) -> dict:
+        value = get_in(record, source, _MISSING)
+        if value is _MISSING:
+            # Nothing to move
+            return record
+        return set_in(delete_in(record, source), target, value)
+
+    return move
+
+
+def _operation_path(operation: dict) -> tuple:
+    """Path of the dict (select_keys, flatten) or value an operation targets."""
+    if operation.get("op") in ("select_keys", "flatten"):
+        return _path(operation["key"]) if "key" in operation else ()
+    return _path(_required(operation, "key"))
+
+
+def _compile_keypath_step(operation: dict, path: tuple) -> Step:
+    """Run an operation on a path through lists as its own step."""
+    op = operation.get("op")
+    if op == "add_key":
+        value = operation.get("value")
+        return lambda record: set_in(record, path, value)
+    if op == "remove_key":
+        return lambda record: delete_in(record, path)
+    if op == "cast":
+        # Validated by _compile_operation
+        cast_fn = CASTS[operation["type"]]
+        return lambda record: update_in(
+            record, path, lambda value: value if value is None else cast_fn(value)
+        )
+
+    # rename_key, select_keys, flatten: apply to each dict at the location
+    location, _, _, action = _compile_operation(operation)
+
+    def apply_to_dict(node: Any) -> Any:
+        return action(dict(node)) if isinstance(node, dict) else node
+
+    return lambda record: update_in(record, location, apply_to_dict)
+
+
+def _conflicts(applied: list[tuple], location: tuple, touched: Any) -> bool:
+    """True if this operation touches a subtree an earlier one already changed."""
+    depth = len(location)
+    for earlier_location in applied:
+        if (
+            len(earlier_location) > depth
+            and earlier_location[:depth] == location
+            and (touched is ALL_KEYS or earlier_location[depth] in touched)
+        ):
+            return True
+    return False
+
+
+def compile_chain(operations: list[dict]) -> Step:
+    """Compile chain operations into a function from record to new record."""
+    if not isinstance(operations, list):
+        raise InvalidTransformationError("Chain operations must be a list")
+
+    steps: list[Step] = []
+    trie, applied = None, []
+
+    def flush():
+        if trie is not None:
+            steps.append(lambda record, walk=trie: walk.run(dict(record)))
+
+    for operation in operations:
+        if not isinstance(operation, dict):
+            raise InvalidTransformationError("Chain operations must be objects")
+        if operation.get("op") not in OPERATIONS:
+            raise InvalidTransformationError(
+                f"Unsupported chain operation: {operation.get('op')}"
+            )
+        if operation.get("op") == "move_key":
+            flush()
+            trie, applied = None, []
+            steps.append(_compile_move(operation))
+            continue
+
+        location, touched, creates, action = _compile_operation(operation)
+        path = _operation_path(operation)
+        if not _dict_keys_only(path):
+            flush()
+            trie, applied = None, []
+            steps.append(_compile_keypath_step(operation, path))
+            continue
+
+        if trie is None or _conflicts(applied, location, touched):
+            flush()
+            trie, applied = _Trie(), []
+        trie.node_at(location, creates).actions.append(action)
+        applied.append(location)
+    flush()
+
+    def apply_chain(record: dict) -> dict:
+        if not isinstance(record, dict):
+            raise TypeError("Transformation chains require an object record")
+        for step in steps:
+            record = step(record)
+        return record
+
+    return apply_chain
+
+
+@lru_cache(maxsize=1024)
+def _compile_canonical(canonical_operations: str) -> Step:
+    return compile_chain(json.loads(canonical_operations))
+
+
+def get_compiled_chain(operations: list[dict]) -> Step:
+    """Compiled chain for operations, cached by their canonical definition."""
+    return _compile_canonical(json.dumps(operations, sort_keys=True))
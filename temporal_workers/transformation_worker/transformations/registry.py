@@ -0,0 +1,161 @@
+"""
+Resolves transformation_fn strings (e.g. "JSON.add_key") to callables.
+
+Built-in transformations are registered from the Transformation namespace, and
+third-party packages can add their own through the "datanadhi.transformations"
+entry point group. An entry point may point at a function, registered under the
+entry point name, or at a class of static methods, registered as
+"<entry point name>.<method>".
+
+Everything is resolved once on first use, so dispatch is a single dict lookup.
+"""
+
+import threading
+from collections.abc import Callable
+from importlib.metadata import entry_points
+from typing import Any
+
+from utils.exceptions import (
+    DataNadhiError,
+    InvalidPipelineConfigError,
+    InvalidTransformationError,
+)
+from utils.logger import log_warn
+from utils.workflow_utils import invalid_pipeline_nodes
+
+from .chain import get_compiled_chain
+
+ENTRY_POINT_GROUP = "datanadhi.transformations"
+
+# Optional prefix allowed in transformation_fn strings
+PREFIX = "Transformation."
+
+TransformationFn = Callable[[Any, dict], Any]
+
+
+def _namespace_functions(name: str, namespace: type) -> dict[str, TransformationFn]:
+    functions = {}
+    for attr in vars(namespace):
+        fn = getattr(namespace, attr)
+        if not attr.startswith("_") and callable(fn):
+            functions[f"{name}.{attr}"] = fn
+    return functions
+
+
+class TransformationRegistry:
+    _registry: dict[str, TransformationFn] | None = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def _builtins(cls) -> dict[str, TransformationFn]:
+        from .core import Transformation
+
+        functions = {}
+        for name, namespace in vars(Transformation).items():
+            if isinstance(namespace, type):
+                functions.update(_namespace_functions(name, namespace))
+        return functions
+
+    @classmethod
+    def _plugins(cls) -> dict[str, TransformationFn]:
+        functions = {}
+        for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+            try:
+                loaded = entry_point.load()
+            except Exception as exc:
+                # A broken plugin shouldn't take down the built-in transformations;
+                # pipelines using it fail validation instead
+                log_warn(
+                    "Failed to load transformation plugin",
+                    None,
+                    {
+                        "component": "transformation_registry",
+                        "entry_point": entry_point.name,
+                        "error": str(exc),
+                    },
+                )
+                continue
+            if isinstance(loaded, type):
+                functions.update(_namespace_functions(entry_point.name, loaded))
+            elif callable(loaded):
+                functions[entry_point.name] = loaded
+        return functions
+
+    @classmethod
+    def _functions(cls) -> dict[str, TransformationFn]:
+        if cls._registry is None:
+            with cls._lock:
+                if cls._registry is None:
+                    # Built-ins win over plugins registering the same name
+                    cls._registry = {**cls._plugins(), **cls._builtins()}
+        return cls._registry
+
+    @classmethod
+    def register(cls, name: str, fn: TransformationFn | type):
+        """Register a function, or a class of static methods as a namespace."""
+        functions = cls._functions()
+        if isinstance(fn, type):
+            functions.update(_namespace_functions(name, fn))
+        else:
+            functions[name] = fn
+
+    @classmethod
+    def names(cls) -> list[str]:
+        return sorted(cls._functions())
+
+    @classmethod
+    def get(cls, fn_key: str) -> TransformationFn | None:
+        """Callable for fn_key, with or without the "Transformation." prefix."""
+        if not isinstance(fn_key, str):
+            return None
+        functions = cls._functions()
+        fn = functions.get(fn_key)
+        if fn is None and fn_key.startswith(PREFIX):
+            fn = functions.get(fn_key[len(PREFIX) :])
+            if fn is not None:
+                # Cache the prefixed spelling too so later lookups are direct
+                functions[fn_key] = fn
+        return fn
+
+    @classmethod
+    def resolve(cls, fn_key: str) -> TransformationFn:
+        fn = cls.get(fn_key)
+        if fn is None:
+            raise InvalidTransformationError(
+                f"Transformation function not found: {fn_key}"
+            )
+        return fn
+
+
+def validate_workflow_config(workflow_config: dict):
+    """
+    Check the workflow config is well formed, every transformation node
+    references a function registered on this worker (built-in or plugin) and
+    every transformation-chain node compiles.
+
+    Raises:
+        InvalidPipelineConfigError: listing each invalid node
+    """
+    invalid = invalid_pipeline_nodes(workflow_config)
+    for node_id, node_config in workflow_config.items():
+        if not isinstance(node_config, dict):
+            continue
+        node_type = node_config.get("type")
+        if node_type == "transformation":
+            fn_key = node_config.get("transformation_fn")
+            if (
+                fn_key
+                and isinstance(fn_key, str)
+                and TransformationRegistry.get(fn_key) is None
+            ):
+                invalid.append(f"{node_id} ({fn_key})")
+        elif node_type == "transformation-chain":
+            try:
+                get_compiled_chain(node_config.get("operations", []))
+            except DataNadhiError as exc:
+                invalid.append(f"{node_id} ({exc})")
+
+    if invalid:
+        raise InvalidPipelineConfigError(
+            f"Invalid pipeline nodes: {', '.join(invalid)}"
+        )
@@ -1,24 +1,20 @@
-import copy
+"""
+Keychain helpers for records moving through the pipeline.
+
+Records are treated as immutable and shared between nodes and branches: reads never
+copy, and writes go through utils.keypath.set_in/delete_in (structural sharing).
+Keychains are parsed by utils.keypath, so "$.a[0]", "$.a[*].b" and quoted keys
+work everywhere a keychain is accepted.
+"""
+
 from typing import Any
 
+from utils.keypath import is_keypath, parse_keypath
+
 
 def get_keychain_from_str(keychain_str: str) -> Any:
-    return keychain_str[2:].split(".")
+    return list(parse_keypath(keychain_str))
 
 
 def _is_keychain_str(keychain_str: str) -> bool:
-    return type(keychain_str) is str and keychain_str.startswith("$.")
-
-
-def get_value_from_data(data: dict, key: str) -> Any:
-    """Extract value from data using keychain or direct key"""
-    if _is_keychain_str(key):
-        keys = get_keychain_from_str(key)
-        current = copy.deepcopy(data)
-        for k in keys:
-            if isinstance(current, dict) and k in current:
-                current = current[k]
-            else:
-                return None
-        return current
-    return data.get(key)
+    return is_keypath(keychain_str)
@@ -1,108 +1,307 @@
-import copy
+import asyncio
 from datetime import timedelta
 
 from temporalio import workflow
+from temporalio.common import RetryPolicy
 from temporalio.exceptions import ActivityError, ApplicationError
 
 from utils.retry_policies import get_default_retry_policy
-from utils.workflow_utils import extract_exception_details
+from utils.workflow_options import get_workflow_options
+from utils.workflow_utils import (
+    CONCURRENT_BRANCHES_PATCH,
+    end_node_targets,
+    extract_exception_details,
+)
+
+from .retention import (
+    DEFAULT_RETENTION,
+    RETENTION_MODES,
+    trim_end_outputs,
+    trim_intermediate_outputs,
+)
+
+# Pipeline executionMode that runs the whole graph in a single activity
+INLINE_EXECUTION_MODE = "inline"
+
+# Node type -> (activity name, failure label)
+NODE_ACTIVITIES = {
+    "transformation": ("transform", "TransformationWorkflow-transform"),
+    "transformation-chain": (
+        "transform_chain",
+        "TransformationWorkflow-transform_chain",
+    ),
+    "condition-branching": ("filters", "TransformationWorkflow-filters"),
+}
 
 
 @workflow.defn
 class TransformationWorkflow:
     def __init__(self):
-        self.queue = []
         self.node_outputs = {}  # Will store arrays of outputs per node
+        self.destination_counts = {}  # (node id, target id) -> children started
+        self.slots = None  # Caps concurrently running nodes
+        self.concurrent = True  # False when replaying pre-patch executions
+        self.retention = DEFAULT_RETENTION  # How much of node_outputs to return
 
     @workflow.run
     async def traverse_workflow(
-        self, pipeline_config: dict, log_data: dict, start_node_id: str, ctx: dict
+        self,
+        pipeline_config: dict,
+        log_data: dict,
+        start_node_id: str,
+        ctx: dict,
+        options: dict | None = None,
     ) -> dict:
-        info = workflow.info()
+        options = options or {}
         if start_node_id not in pipeline_config:
             return {
                 "success": False,
                 "reason": "Start node not found in pipeline config",
             }
 
-        self.queue.append({"node_id": start_node_id, "data": copy.deepcopy(log_data)})
-
-        while self.queue:
-            current_input = self.queue.pop(0)
-            current_node_id = current_input.get("node_id")
-            current_data = current_input.get("data")
-
-            current_node_config = pipeline_config.get(current_node_id)
-
-            node_type = current_node_config.get("type")
-
-            next_nodes, final_data = [], current_data
-            if node_type == "transformation":
-                try:
-                    result = await workflow.execute_activity(
-                        "transform",
-                        args=(current_node_config, current_data, ctx),
-                        schedule_to_close_timeout=timedelta(minutes=5),
-                        retry_policy=get_default_retry_policy(),
-                    )
-                    next_nodes, final_data = result
-                except (ApplicationError, ActivityError) as exc:
-                    # Log failure but continue processing other nodes
-                    exc_type, exc_message, exc_stack = extract_exception_details(exc)
-                    final_data = await workflow.execute_activity(
-                        "log_failure",
-                        args=(
-                            exc_type,
-                            exc_message,
-                            exc_stack,
-                            exc_message,
-                            ctx,
-                            current_data,
-                            None,
-                            "TransformationWorkflow-transform",
-                        ),
-                        schedule_to_close_timeout=timedelta(minutes=2),
-                    )
-            elif node_type == "condition-branching":
-                try:
-                    result = await workflow.execute_activity(
-                        "filters",
-                        args=(current_node_config, current_data, ctx),
-                        schedule_to_close_timeout=timedelta(minutes=5),
-                        retry_policy=get_default_retry_policy(),
-                    )
-                    next_nodes, final_data = result
-                except (ApplicationError, ActivityError) as exc:
-                    # Log failure but continue processing other nodes
-                    exc_type, exc_message, exc_stack = extract_exception_details(exc)
-                    final_data = await workflow.execute_activity(
-                        "log_failure",
-                        args=(
-                            exc_type,
-                            exc_message,
-                            exc_stack,
-                            exc_message,
-                            ctx,
-                            current_data,
-                            None,
-                            "TransformationWorkflow-filters",
-                        ),
-                        schedule_to_close_timeout=timedelta(minutes=2),
-                    )
-            elif node_type == "end":
-                final_data = await workflow.execute_child_workflow(
-                    "DestinationWorkflow",
-                    args=(current_data, current_node_config["target_id"], ctx),
-                    task_queue=info.task_queue.replace("-transform", "-destination"),
-                    id=info.workflow_id.replace("-transform", "-destination"),
+        max_parallelism = (
+            options.get("maxParallelism")
+            or get_workflow_options().max_parallel_branches
+        )
+        if (
+            isinstance(max_parallelism, bool)
+            or not isinstance(max_parallelism, int)
+            or max_parallelism < 1
+        ):
+            return {
+                "success": False,
+                "reason": "maxParallelism must be a positive integer",
+            }
+        self.slots = asyncio.Semaphore(max_parallelism)
+        self.concurrent = workflow.patched(CONCURRENT_BRANCHES_PATCH)
+
+        retention = (
+            options.get("nodeOutputRetention")
+            or get_workflow_options().node_output_retention
+        )
+        if retention in RETENTION_MODES:
+            self.retention = retention
+
+        if options.get("executionMode") == INLINE_EXECUTION_MODE:
+            if await self.traverse_inline(
+                pipeline_config, log_data, start_node_id, ctx
+            ):
+                return self.result(pipeline_config)
+            # Inline run failed on a retryable error; redo it node by node so each
+            # node gets its own retries
+            self.node_outputs = {}
+
+        await self.traverse_per_node(pipeline_config, log_data, start_node_id, ctx)
+        self.node_outputs = trim_intermediate_outputs(
+            self.node_outputs, pipeline_config, self.retention
+        )
+        return self.result(pipeline_config)
+
+    def result(self, pipeline_config: dict) -> dict:
+        """
+        Workflow result, with node_outputs cut down to the retention mode.
+
+        Intermediate outputs are already trimmed by the time this runs; this
+        applies the mode to end node (destination) results.
+        """
+        node_outputs = trim_end_outputs(
+            self.node_outputs, pipeline_config, self.retention
+        )
+        return {"success": True, "node_outputs": node_outputs}
+
+    async def traverse_inline(
+        self, pipeline_config: dict, log_data: dict, start_node_id: str, ctx: dict
+    ) -> bool:
+        """Run the graph in one activity. Returns False to fall back to per-node."""
+        try:
+            result = await workflow.execute_activity(
+                "run_pipeline_inline",
+                args=(pipeline_config, log_data, start_node_id, ctx, self.retention),
+                schedule_to_close_timeout=timedelta(minutes=5),
+                # No retries here; the per-node fallback retries each node instead
+                retry_policy=RetryPolicy(maximum_attempts=1),
+            )
+        except (ApplicationError, ActivityError):
+            return False
+
+        for failure in result["failures"]:
+            await workflow.execute_activity(
+                "log_failure",
+                args=(
+                    failure["exc_type"],
+                    failure["exc_message"],
+                    failure["exc_stack"],
+                    failure["exc_message"],
+                    ctx,
+                    failure["current_input"],
+                    {"node_id": failure["node_id"], "execution_mode": "inline"},
+                    f"TransformationWorkflow-{failure['activity']}",
+                ),
+                schedule_to_close_timeout=timedelta(minutes=2),
+            )
+
+        self.node_outputs = result["node_outputs"]
+        deliveries = result["deliveries"]
+
+        async def deliver(delivery: dict):
+            # Results recorded before end nodes took several targets have target_id
+            target_ids = delivery.get("target_ids") or [delivery["target_id"]]
+            async with self.slots:
+                return await self.send_to_targets(
+                    delivery["data"], delivery["node_id"], target_ids, ctx
                 )
 
-            for nd in next_nodes:
-                self.queue.append({"node_id": nd, "data": final_data})
+        results = await self.gather(deliver(d) for d in deliveries)
+        for delivery, destination_result in zip(deliveries, results, strict=True):
+            outputs = self.node_outputs[delivery["node_id"]]
+            outputs[delivery["index"]] = destination_result
+        return True
+
+    async def gather(self, coroutines) -> list:
+        """
+        asyncio.gather, or one at a time for executions started before
+        CONCURRENT_BRANCHES_PATCH so they replay their original command order.
+        """
+        if self.concurrent:
+            return await asyncio.gather(*coroutines)
+        return [await coroutine for coroutine in coroutines]
 
-            # Store multiple outputs per node as array
-            if current_node_id not in self.node_outputs:
-                self.node_outputs[current_node_id] = []
-            self.node_outputs[current_node_id].append(final_data)
+    def destination_workflow_id(self, node_id: str, target_id: str | None) -> str:
+        """
+        Unique, replay-stable child id so concurrent end nodes don't collide.
 
-        return {"success": True, "node_outputs": self.node_outputs}
+        The id is "<base>-<node_id>", plus "-<target_id>" for end nodes with
+        several targets and "-<count>" on repeat visits. Executions started
+        before CONCURRENT_BRANCHES_PATCH start their children one at a time and
+        replay with the original id, "<base>", for every child.
+        """
+        base = workflow.info().workflow_id.replace("-transform", "-destination")
+        if not self.concurrent:
+            return base
+        count = self.destination_counts.get((node_id, target_id), 0) + 1
+        self.destination_counts[(node_id, target_id)] = count
+        suffix = node_id if target_id is None else f"{node_id}-{target_id}"
+        if count > 1:
+            suffix = f"{suffix}-{count}"
+        return f"{base}-{suffix}"
+
+    async def send_to_destination(
+        self, data, node_id: str, target_id: str, ctx: dict, fan_out: bool = False
+    ):
+        info = workflow.info()
+        return await workflow.execute_child_workflow(
+            "DestinationWorkflow",
+            args=(data, target_id, ctx),
+            task_queue=info.task_queue.replace("-transform", "-destination"),
+            id=self.destination_workflow_id(node_id, target_id if fan_out else None),
+        )
+
+    async def send_to_targets(self, data, node_id: str, target_ids: list, ctx: dict):
+        """
+        Deliver to every target of an end node concurrently (one at a time
+        before CONCURRENT_BRANCHES_PATCH).
+
+        A single target returns its DestinationWorkflow result as is; several
+        return {"success": all succeeded, "targets": {target_id: result}}.
+        """
+        if len(target_ids) == 1:
+            return await self.send_to_destination(data, node_id, target_ids[0], ctx)
+
+        results = await self.gather(
+            self.send_to_destination(data, node_id, target_id, ctx, fan_out=True)
+            for target_id in target_ids
+        )
+        return {
+            "success": all(result.get("success") for result in results),
+            "targets": dict(zip(target_ids, results, strict=True)),
+        }
+
+    async def run_node(self, node_id: str, node_config: dict, data, ctx: dict):
+        """Execute a single node. Returns (next node ids, output data)."""
+        node_type = node_config.get("type")
+
+        if node_type in NODE_ACTIVITIES:
+            activity_name, failure_label = NODE_ACTIVITIES[node_type]
+            try:
+                return await workflow.execute_activity(
+                    activity_name,
+                    args=(node_config, data, ctx),
+                    schedule_to_close_timeout=timedelta(minutes=5),
+                    retry_policy=get_default_retry_policy(),
+                )
+            except (ApplicationError, ActivityError) as exc:
+                # Log failure but continue processing other nodes
+                exc_type, exc_message, exc_stack = extract_exception_details(exc)
+                failure = await workflow.execute_activity(
+                    "log_failure",
+                    args=(
+                        exc_type,
+                        exc_message,
+                        exc_stack,
+                        exc_message,
+                        ctx,
+                        data,
+                        None,
+                        failure_label,
+                    ),
+                    schedule_to_close_timeout=timedelta(minutes=2),
+                )
+                return [], failure
+
+        if node_type == "end":
+            return [], await self.send_to_targets(
+                data, node_id, end_node_targets(node_config), ctx
+            )
+
+        return [], data
+
+    async def traverse_per_node(
+        self, pipeline_config: dict, log_data: dict, start_node_id: str, ctx: dict
+    ):
+        """
+        Run each node as its own activity.
+
+        Independent branches run concurrently, capped by self.slots. Outputs are
+        recorded against the node's position in the graph and replayed in
+        breadth-first order, so node_outputs matches a sequential traversal.
+        """
+        if not self.concurrent:
+            await self.traverse_sequential(
+                pipeline_config, log_data, start_node_id, ctx
+            )
+            return
+
+        executions = []
+
+        async def run_branch(node_id: str, data, path: tuple):
+            async with self.slots:
+                next_nodes, final_data = await self.run_node(
+                    node_id, pipeline_config.get(node_id), data, ctx
+                )
+            executions.append((path, node_id, final_data))
+            await asyncio.gather(
+                *(
+                    run_branch(nd, final_data, (*path, index))
+                    for index, nd in enumerate(next_nodes)
+                )
+            )
+
+        await run_branch(start_node_id, log_data, (0,))
+
+        # Store multiple outputs per node as array, in breadth-first order
+        executions.sort(key=lambda execution: (len(execution[0]), execution[0]))
+        for _, node_id, final_data in executions:
+            self.node_outputs.setdefault(node_id, []).append(final_data)
+
+    async def traverse_sequential(
+        self, pipeline_config: dict, log_data: dict, start_node_id: str, ctx: dict
+    ):
+        """Run nodes one at a time, breadth-first (before CONCURRENT_BRANCHES_PATCH)."""
+        queue = [(start_node_id, log_data)]
+        while queue:
+            node_id, data = queue.pop(0)
+            next_nodes, final_data = await self.run_node(
+                node_id, pipeline_config.get(node_id), data, ctx
+            )
+            queue.extend((nd, final_data) for nd in next_nodes)
+            self.node_outputs.setdefault(node_id, []).append(final_data)
@@ -0,0 +1,77 @@
+import asyncio
+import math
+
+import pytest
+from temporalio.api.common.v1 import Payload
+from temporalio.converter import DataConverter
+
+from utils.data_converter import (
+    STDLIB_JSON_KEY,
+    DataNadhiPayloadConverter,
+    OrjsonPlainPayloadConverter,
+    ZstdPayloadCodec,
+)
+
+
+@pytest.fixture
+def converter():
+    return OrjsonPlainPayloadConverter()
+
+
+def round_trip(converter, value):
+    return converter.from_payload(converter.to_payload(value))
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        2**70,
+        -(2**70),
+        {"id": 2**64, "nested": [1, 2**100, {"n": -(2**65)}]},
+    ],
+)
+def test_big_ints_round_trip_exactly(converter, value):
+    payload = converter.to_payload(value)
+    assert payload.metadata[STDLIB_JSON_KEY] == b"stdlib"
+
+    result = converter.from_payload(payload)
+    assert result == value
+    assert type(result) is type(value)
+
+
+def test_big_int_is_not_read_as_float(converter):
+    result = round_trip(converter, {"value": 2**70 + 1})
+    assert isinstance(result["value"], int)
+    assert result["value"] - 2**70 == 1
+
+
+def test_64_bit_ints_use_orjson(converter):
+    value = {"max": 2**63 - 1, "min": -(2**63), "unsigned": 2**64 - 1}
+    payload = converter.to_payload(value)
+    assert STDLIB_JSON_KEY not in payload.metadata
+    assert converter.from_payload(payload) == value
+
+
+def test_plain_json_round_trips(converter):
+    value = {"b": [1, 2.5, None, True, "x"], "a": {"nested": "ü"}}
+    assert round_trip(converter, value) == value
+
+
+def test_unmarked_stdlib_payload_decodes(converter):
+    # Written by a client using the default converter, which can emit NaN
+    payload = Payload(metadata={"encoding": b"json/plain"}, data=b'{"x": NaN}')
+    assert math.isnan(converter.from_payload(payload)["x"])
+
+
+def test_data_converter_round_trip_with_compression():
+    data_converter = DataConverter(
+        payload_converter_class=DataNadhiPayloadConverter,
+        payload_codec=ZstdPayloadCodec(threshold_bytes=16),
+    )
+    values = [{"id": 2**70, "text": "x" * 100}, {"id": 1, "text": "y" * 100}]
+
+    async def run():
+        payloads = await data_converter.encode(values)
+        return await data_converter.decode(payloads, [dict, dict])
+
+    assert asyncio.run(run()) == values
@@ -0,0 +1,276 @@
+import asyncio
+import gzip
+import json
+
+import orjson
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from temporal_workers.destination_worker.destinations import webhook
+from temporal_workers.destination_worker.destinations.http_client import http_client
+from temporal_workers.destination_worker.destinations.webhook import (
+    WebhookDestination,
+    WebhookUnavailableError,
+    _TargetSlots,
+)
+from utils.exceptions import DataNadhiError, DestinationSendError
+from utils.retry_policies import NON_RETRYABLE_EXCEPTIONS
+
+
+class StandIn:
+    """Local stand-in for a webhook receiver, answering with a fixed status."""
+
+    def __init__(self, status: int = 200):
+        self.status = status
+        self.requests: list[dict] = []
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests.append(
+            {
+                "method": request.method,
+                "headers": dict(request.headers),
+                # aiohttp decompresses gzip request bodies on read
+                "body": await request.read(),
+            }
+        )
+        return web.Response(status=self.status, text="stand-in says no")
+
+
+def run_with_server(stand_in: StandIn, scenario):
+    """Run scenario(url) against a local server, then close the shared session."""
+
+    async def run():
+        app = web.Application()
+        app.router.add_route("*", "/hook", stand_in.handle)
+        server = TestServer(app)
+        await server.start_server()
+        try:
+            return await scenario(str(server.make_url("/hook")))
+        finally:
+            await http_client.close()
+            await server.close()
+
+    return asyncio.run(run())
+
+
+def destination(url: str, record, **params) -> WebhookDestination:
+    return WebhookDestination(
+        record,
+        {"targetId": "t-1", "destinationParams": {"url": url, **params}},
+        {"creds": {"headers": {"Authorization": "Bearer token"}}},
+    )
+
+
+def test_posts_record_as_json():
+    stand_in = StandIn()
+
+    async def scenario(url):
+        return await destination(url, {"a": 1}, headers={"X-Source": "dn"}).send()
+
+    result = run_with_server(stand_in, scenario)
+
+    assert result == {"success": True, "status": 200}
+    [request] = stand_in.requests
+    assert request["method"] == "POST"
+    assert request["headers"]["Content-Type"] == "application/json"
+    assert request["headers"]["Authorization"] == "Bearer token"
+    assert request["headers"]["X-Source"] == "dn"
+    assert orjson.loads(request["body"]) == {"a": 1}
+
+
+def test_posts_ints_beyond_64_bits_exactly():
+    stand_in = StandIn()
+    record = {"id": 2**70 + 1, "nested": [-(2**65)], "text": "ü"}
+
+    async def scenario(url):
+        return await destination(url, record).send()
+
+    assert run_with_server(stand_in, scenario)["success"]
+    [request] = stand_in.requests
+    assert json.loads(request["body"]) == record
+
+
+def test_unserializable_record_fails_the_send():
+    with pytest.raises(ValueError, match="not JSON serializable"):
+        destination("http://localhost/hook", {}).encode({"a": {1, 2}})
+
+
+@pytest.mark.parametrize("size", [10, webhook.GZIP_IN_THREAD_BYTES + 1])
+def test_gzip_body(size):
+    stand_in = StandIn()
+    record = {"text": "x" * size}
+
+    async def scenario(url):
+        return await destination(url, record, gzip=True).send()
+
+    assert run_with_server(stand_in, scenario)["success"]
+    [request] = stand_in.requests
+    assert request["headers"]["Content-Encoding"] == "gzip"
+    assert orjson.loads(request["body"]) == record
+
+
+def test_gzip_is_compressed_on_the_wire(monkeypatch):
+    sent = []
+    compress = gzip.compress
+
+    def recording_compress(data, level):
+        sent.append(compress(data, level))
+        return sent[-1]
+
+    monkeypatch.setattr(webhook.gzip, "compress", recording_compress)
+    stand_in = StandIn()
+
+    async def scenario(url):
+        return await destination(url, {"a": "y" * 1000}, gzip=True).send()
+
+    run_with_server(stand_in, scenario)
+    assert len(sent[0]) < len(stand_in.requests[0]["body"])
+    assert gzip.decompress(sent[0]) == stand_in.requests[0]["body"]
+
+
+def test_batches_records_as_ndjson():
+    stand_in = StandIn()
+    records = [{"n": n} for n in range(5)]
+
+    async def scenario(url):
+        return await asyncio.gather(
+            *(
+                destination(
+                    url, record, batch={"windowSeconds": 0.05, "maxRecords": 3}
+                ).send()
+                for record in records
+            )
+        )
+
+    results = run_with_server(stand_in, scenario)
+
+    # maxRecords flushes the first three, the window flushes the rest
+    assert [len(request["body"].splitlines()) for request in stand_in.requests] == [
+        3,
+        2,
+    ]
+    assert [result["records"] for result in results] == [3, 3, 3, 2, 2]
+    assert all(result["batched"] and result["success"] for result in results)
+    lines = []
+    for request in stand_in.requests:
+        assert request["headers"]["Content-Type"] == "application/x-ndjson"
+        assert request["body"].endswith(b"\n")
+        lines += request["body"].splitlines()
+    assert [orjson.loads(line) for line in lines] == records
+
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_throttling_and_server_errors_are_retryable(status):
+    stand_in = StandIn(status)
+
+    async def scenario(url):
+        return await destination(url, {"a": 1}).send()
+
+    with pytest.raises(WebhookUnavailableError) as exc_info:
+        run_with_server(stand_in, scenario)
+
+    # Retried by the activity retry policy and by send_batch_to_destination
+    assert not isinstance(exc_info.value, DataNadhiError)
+    assert type(exc_info.value).__name__ not in NON_RETRYABLE_EXCEPTIONS
+    assert str(status) in str(exc_info.value)
+
+
+@pytest.mark.parametrize("status", [400, 401, 404, 422])
+def test_client_errors_fail_the_send(status):
+    stand_in = StandIn(status)
+
+    async def scenario(url):
+        return await destination(url, {"a": 1}).send()
+
+    with pytest.raises(DestinationSendError, match="stand-in says no"):
+        run_with_server(stand_in, scenario)
+
+
+def test_batch_failure_fails_every_record():
+    stand_in = StandIn(503)
+
+    async def scenario(url):
+        return await asyncio.gather(
+            *(
+                destination(url, {"n": n}, batch={"windowSeconds": 0.05}).send()
+                for n in range(3)
+            ),
+            return_exceptions=True,
+        )
+
+    results = run_with_server(stand_in, scenario)
+    assert len(stand_in.requests) == 1
+    assert all(isinstance(result, WebhookUnavailableError) for result in results)
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"url": "ftp://example.com"},
+        {"method": "GET"},
+        {"timeoutSeconds": 0},
+        {"concurrency": 0},
+        {"batch": {"maxRecords": 0}},
+        {"headers": {"X-Count": 1}},
+    ],
+)
+def test_invalid_config(params):
+    target = {"destinationParams": {"url": "http://localhost/hook", **params}}
+    with pytest.raises(ValueError):
+        WebhookDestination({}, target, {}).validate()
+
+
+def test_concurrency_limit():
+    in_flight = {"now": 0, "max": 0}
+
+    async def handle(request):
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        await asyncio.sleep(0.02)
+        in_flight["now"] -= 1
+        return web.Response()
+
+    stand_in = StandIn()
+    stand_in.handle = handle
+    concurrency = 2
+
+    async def scenario(url):
+        await asyncio.gather(
+            *(
+                destination(url, {"n": n}, concurrency=concurrency).send()
+                for n in range(8)
+            )
+        )
+
+    run_with_server(stand_in, scenario)
+    assert in_flight["max"] == concurrency
+
+
+def test_target_slots_are_bounded():
+    max_size = 3
+    slots = _TargetSlots(max_size=max_size)
+
+    async def use_targets():
+        for n in range(10):
+            target = destination(f"http://host-{n}/hook", {}).validate()
+            slots.get(target)
+
+    asyncio.run(use_targets())
+    assert len(slots) == max_size
+
+
+def test_target_slots_follow_concurrency_changes():
+    slots = _TargetSlots()
+
+    async def semaphores():
+        first = slots.get(destination("http://host/hook", {}).validate())
+        same = slots.get(destination("http://host/hook", {}).validate())
+        changed = slots.get(
+            destination("http://host/hook", {}, concurrency=3).validate()
+        )
+        return first, same, changed
+
+    first, same, changed = asyncio.run(semaphores())
+    assert first is same
+    assert changed is not first
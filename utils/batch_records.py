@@ -0,0 +1,138 @@
+"""
+Record batches stored in MinIO for BatchMainWorkflow.
+
+A batch given as records_ref ({path, bucket} of a JSON list of {messageId,
+log_data}) never travels through workflow history. The workflow only passes
+slices, {"records_ref", "offset", "count"}, and each activity loads the list and
+takes its slice. Records inside the workflow are referred to by
+{"records_ref", "index"}, which log_failure resolves for the failure log.
+
+The same goes for what a chunk produces: run_pipeline_batch stores the chunk's
+delivery data and failure inputs as one list (under the claim-check prefix) and
+returns {"records_ref", "index"} references to its entries, which
+send_batch_to_destination and log_failure resolve. History then grows by a
+small reference per record instead of by the records themselves.
+
+Loaded lists are cached per process, so a worker running several chunks of the
+same batch downloads it once. Records are never mutated, so the cached list can
+be shared.
+"""
+
+import asyncio
+import os
+from typing import Any
+
+from utils.claim_check import CLAIM_CHECK_KEY, offload
+from utils.exceptions import InvalidInputDataError
+from utils.local_cache import LocalCache
+from utils.minio_service import MinioService
+
+loaded_cache = LocalCache(
+    "batch_records.loaded",
+    max_size=int(os.getenv("BATCH_RECORDS_CACHE_MAX_SIZE", "8")),
+    ttl_seconds=float(os.getenv("BATCH_RECORDS_CACHE_TTL_SECONDS", "300")),
+)
+
+
+def _cache_key(records_ref: dict) -> str:
+    return f"{records_ref.get('bucket')}/{records_ref['path']}"
+
+
+def is_batch_record(value: Any) -> bool:
+    """True for a {"records_ref", "index"} reference to an entry of a stored list."""
+    return isinstance(value, dict) and value.keys() == {"records_ref", "index"}
+
+
+def _load_sync(records_ref: dict) -> list[dict]:
+    cache_key = _cache_key(records_ref)
+    records = loaded_cache.get(cache_key)
+    if records is None:
+        records = MinioService().get_json(
+            records_ref["path"], records_ref.get("bucket")
+        )
+        if not isinstance(records, list):
+            raise InvalidInputDataError(
+                f"Batch records must be a JSON list: {records_ref['path']}"
+            )
+        loaded_cache.set(cache_key, records)
+    return records
+
+
+async def load_batch_records(records_ref: dict) -> list[dict]:
+    """
+    Load a batch of records stored in MinIO as a JSON list.
+
+    Raises:
+        InvalidInputDataError: if the object isn't a JSON list
+    """
+    return await asyncio.to_thread(_load_sync, records_ref)
+
+
+async def resolve_batch_records(records: Any) -> list[dict]:
+    """Records of a slice from BatchMainWorkflow; a list is returned as is."""
+    if not isinstance(records, dict):
+        return records
+    offset = records["offset"]
+    loaded = await load_batch_records(records["records_ref"])
+    return loaded[offset : offset + records["count"]]
+
+
+async def resolve_batch_record(record_ref: dict) -> dict:
+    """The record a {"records_ref", "index"} reference points to."""
+    return (await load_batch_records(record_ref["records_ref"]))[record_ref["index"]]
+
+
+async def resolve_batch_payloads(values: list) -> list:
+    """
+    Resolve {"records_ref", "index"} references in values, loading each stored
+    list once; other values are returned as is.
+    """
+    loaded = {}
+    resolved = []
+    for value in values:
+        if not is_batch_record(value):
+            resolved.append(value)
+            continue
+        cache_key = _cache_key(value["records_ref"])
+        if cache_key not in loaded:
+            loaded[cache_key] = await load_batch_records(value["records_ref"])
+        resolved.append(loaded[cache_key][value["index"]])
+    return resolved
+
+
+def _store_sync(payloads: list, ctx: dict) -> dict:
+    ref = offload(payloads, ctx)[CLAIM_CHECK_KEY]
+    records_ref = {"path": ref["path"], "bucket": ref["bucket"]}
+    loaded_cache.set(_cache_key(records_ref), payloads)
+    return records_ref
+
+
+async def store_batch_payloads(results: list[dict], ctx: dict) -> list[dict]:
+    """
+    Move the delivery data and failure inputs of run_pipeline_batch results into
+    one stored list, replacing each by a {"records_ref", "index"} reference.
+
+    A payload shared by several entries (e.g. a record delivered to several
+    targets) is stored once. Raises if the upload fails, so the chunk is retried.
+    """
+    payloads = []
+    indexes = {}  # id(payload) -> index in payloads
+
+    def entries():
+        for result in results:
+            for delivery in result["deliveries"]:
+                yield delivery, "data"
+            for failure in result["failures"]:
+                yield failure, "current_input"
+
+    for entry, key in entries():
+        if id(entry[key]) not in indexes:
+            indexes[id(entry[key])] = len(payloads)
+            payloads.append(entry[key])
+    if not payloads:
+        return results
+
+    records_ref = await asyncio.to_thread(_store_sync, payloads, ctx)
+    for entry, key in entries():
+        entry[key] = {"records_ref": records_ref, "index": indexes[id(entry[key])]}
+    return results
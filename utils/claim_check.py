@@ -0,0 +1,152 @@
+"""
+Claim-check offloading of large payloads to MinIO.
+
+Payloads above WorkflowOptions.claim_check_threshold_bytes are stored in MinIO and
+replaced by a small reference, {"$claimCheck": {"bucket", "path", "size",
+"sha256"}}, which is what travels through workflow arguments, activity
+inputs/results and history.
+Workflows never look inside the data, so only activities that actually read it
+call resolve_claim_check.
+
+Objects are content-addressed, so the same payload is stored once and resolved
+payloads can be cached per process. MinIO doesn't expire them; configure a
+lifecycle rule on the "claim-checks/" prefix.
+
+MinioService is imported lazily so workflows can import is_claim_check.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+from typing import Any
+
+from temporalio import activity
+
+from utils.local_cache import LocalCache
+from utils.logger import log_debug, log_warn
+from utils.workflow_options import get_workflow_options
+
+CLAIM_CHECK_KEY = "$claimCheck"
+CLAIM_CHECK_PREFIX = "claim-checks"
+
+# Resolved payloads; entries never go stale since objects are content-addressed
+resolved_cache = LocalCache(
+    "claim_check.resolved",
+    max_size=int(os.getenv("CLAIM_CHECK_CACHE_MAX_SIZE", "256")),
+    ttl_seconds=float(os.getenv("CLAIM_CHECK_CACHE_TTL_SECONDS", "300")),
+)
+
+
+def is_claim_check(value: Any) -> bool:
+    return isinstance(value, dict) and len(value) == 1 and CLAIM_CHECK_KEY in value
+
+
+def payload_size(data: Any) -> int:
+    """Size of data as compact JSON, in bytes."""
+    return len(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+
+
+def should_offload(data: Any, threshold: int | None = None) -> bool:
+    """True if data is above the threshold (0 disables offloading)."""
+    if threshold is None:
+        threshold = get_workflow_options().claim_check_threshold_bytes
+    if not threshold or data is None or is_claim_check(data):
+        return False
+    return payload_size(data) > threshold
+
+
+def _object_path(ctx: dict, digest: str) -> str:
+    org_id = ctx.get("organisationId") or "unknown"
+    project_id = ctx.get("projectId") or "unknown"
+    pipeline_id = ctx.get("pipelineId") or "unknown"
+    return f"{CLAIM_CHECK_PREFIX}/{org_id}/{project_id}/{pipeline_id}/{digest}.json"
+
+
+def offload(data: Any, ctx: dict) -> dict:
+    """Store data in MinIO and return its reference. Raises if the upload fails."""
+    from utils.minio_service import MinioService
+
+    encoded = json.dumps(data, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    digest = hashlib.sha256(encoded).hexdigest()
+    path = _object_path(ctx, digest)
+
+    minio = MinioService()
+    minio.put_json(path, data)
+    resolved_cache.set(path, data)
+    return {
+        CLAIM_CHECK_KEY: {
+            "bucket": minio.bucket_name,
+            "path": path,
+            "size": len(encoded),
+            "sha256": digest,
+        }
+    }
+
+
+def offload_or_keep(data: Any, ctx: dict) -> Any:
+    """
+    Offload data, falling back to passing it by value if MinIO can't take it,
+    so offloading never fails the caller.
+    """
+    try:
+        return offload(data, ctx)
+    except Exception as exc:
+        log_warn(
+            "Claim-check offload failed, passing payload by value",
+            ctx,
+            {"component": "claim_check", "error": str(exc)},
+        )
+        return data
+
+
+def offload_if_large(data: Any, ctx: dict) -> Any:
+    """Return a reference for data above the threshold, or data itself."""
+    if not should_offload(data):
+        return data
+    return offload_or_keep(data, ctx)
+
+
+def resolve_claim_check_sync(value: Any) -> Any:
+    """Load the payload a reference points to; other values are returned as is."""
+    if not is_claim_check(value):
+        return value
+    from utils.minio_service import MinioService
+
+    ref = value[CLAIM_CHECK_KEY]
+    data = resolved_cache.get(ref["path"])
+    if data is None:
+        data = MinioService().get_json(ref["path"], ref.get("bucket"))
+        resolved_cache.set(ref["path"], data)
+    return data
+
+
+async def resolve_claim_check(value: Any) -> Any:
+    """Async resolve_claim_check_sync, for activities."""
+    if not is_claim_check(value):
+        return value
+    return await asyncio.to_thread(resolve_claim_check_sync, value)
+
+
+async def offload_if_large_async(data: Any, ctx: dict) -> Any:
+    """Async offload_if_large, for activities."""
+    if not should_offload(data):
+        return data
+    return await asyncio.to_thread(offload_or_keep, data, ctx)
+
+
+@activity.defn
+async def offload_payload(data: Any, ctx: dict) -> dict | None:
+    """
+    Offload a payload if it's above this worker's threshold.
+
+    Run as a local activity, so the payload itself isn't recorded in history; only
+    the result is. That result (the reference, or None to keep passing the payload
+    by value) records the decision, so replays don't depend on the threshold of
+    the worker replaying them.
+    """
+    if not should_offload(data):
+        return None
+    log_debug("Offloading payload to MinIO", ctx, {"component": "claim_check"})
+    ref = await asyncio.to_thread(offload_or_keep, data, ctx)
+    return ref if is_claim_check(ref) else None
@@ -0,0 +1,251 @@
+"""
+Background health monitoring for Redis, Mongo and MinIO.
+
+Request paths consult the recorded backend state instead of sending a PING before
+every real command. A background task per backend runs the health check on a
+timer, reconnects with exponential backoff while the backend is down, and can be
+woken early when a request path observes a failure.
+
+Every WORKER_STATS_INTERVAL_SECONDS it also logs a "Worker stats" line with the
+backend states and any registered stats (rate limiters, client pools, ...).
+Those counters are per process; the line carries the pid so they can be summed
+across workers.
+"""
+
+import asyncio
+import inspect
+import os
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from utils.logger import log_debug, log_info, log_warn
+
+
+class BackendUnavailableError(ConnectionError):
+    """Backend is marked down by the connection manager (retryable)"""
+
+    pass
+
+
+@dataclass
+class BackendState:
+    name: str
+    check: Callable[[], Any]
+    reconnect: Callable[[], Any] | None = None
+    up: bool = True
+    checked: bool = False
+    consecutive_failures: int = 0
+    last_error: str | None = None
+    last_checked_at: float | None = None
+    down_since: float | None = None
+    wakeup: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "up": self.up,
+            "checked": self.checked,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+            "last_checked_at": self.last_checked_at,
+            "down_since": self.down_since,
+        }
+
+
+async def _call(fn: Callable[[], Any]) -> Any:
+    """Run a sync or async callable without blocking the event loop."""
+    if inspect.iscoroutinefunction(fn):
+        return await fn()
+    return await asyncio.to_thread(fn)
+
+
+class ConnectionManager:
+    instance = None
+
+    def __new__(cls):
+        if cls.instance:
+            return cls.instance
+        obj = super().__new__(cls)
+        cls.instance = obj
+        return obj
+
+    def __init__(self):
+        if getattr(self, "_initialized", False):
+            return
+
+        self.interval = float(os.getenv("HEALTH_CHECK_INTERVAL_SECONDS", "10"))
+        self.max_backoff = float(os.getenv("HEALTH_CHECK_MAX_BACKOFF_SECONDS", "60"))
+        self.check_timeout = float(os.getenv("HEALTH_CHECK_TIMEOUT_SECONDS", "5"))
+        # 0 disables the periodic stats log
+        self.stats_interval = float(os.getenv("WORKER_STATS_INTERVAL_SECONDS", "60"))
+
+        self._backends: dict[str, BackendState] = {}
+        self._stats: dict[str, Callable[[], dict[str, Any]]] = {}
+        self._tasks: list[asyncio.Task] = []
+        self._initialized = True
+
+    def register(
+        self,
+        name: str,
+        check: Callable[[], Any],
+        reconnect: Callable[[], Any] | None = None,
+    ):
+        """
+        Register a backend to monitor.
+
+        Args:
+            name: Backend name used by request paths (e.g. "redis")
+            check: Sync or async callable returning True when healthy
+            reconnect: Optional sync or async callable run while the backend is down
+        """
+        self._backends[name] = BackendState(name, check, reconnect)
+
+    def register_stats(self, name: str, stats: Callable[[], dict[str, Any]]):
+        """
+        Include stats() (e.g. a rate limiter's counters) in the periodic
+        worker stats log.
+        """
+        self._stats[name] = stats
+
+    def is_up(self, name: str) -> bool:
+        """Unmonitored backends are assumed to be up."""
+        backend = self._backends.get(name)
+        return backend is None or backend.up
+
+    def raise_if_down(self, name: str):
+        if not self.is_up(name):
+            backend = self._backends[name]
+            raise BackendUnavailableError(
+                f"{name} is unavailable: {backend.last_error or 'health check failed'}"
+            )
+
+    def mark_down(self, name: str, error: Exception | str | None = None):
+        """Record a failure seen on a request path and trigger an early re-check."""
+        backend = self._backends.get(name)
+        if backend is None:
+            return
+        self._set_down(backend, str(error) if error else None)
+        backend.wakeup.set()
+
+    def status(self) -> dict[str, dict[str, Any]]:
+        return {name: b.snapshot() for name, b in self._backends.items()}
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Registered stats; a failing stats() is reported as its error."""
+        stats = {}
+        for name, fn in self._stats.items():
+            try:
+                stats[name] = fn()
+            except Exception as e:
+                stats[name] = {"error": str(e) or type(e).__name__}
+        return stats
+
+    async def start(self):
+        """Connect and check every backend once, then monitor in the background."""
+        if self._tasks:
+            return
+        await asyncio.gather(*(self._initial_check(b) for b in self._backends.values()))
+        self._tasks = [
+            asyncio.create_task(self._monitor(b), name=f"health-{b.name}")
+            for b in self._backends.values()
+        ]
+        if self.stats_interval > 0:
+            self._tasks.append(
+                asyncio.create_task(self._report_stats(), name="worker-stats")
+            )
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _set_down(self, backend: BackendState, error: str | None):
+        if backend.up:
+            backend.down_since = time.time()
+            log_warn(
+                "Backend marked down",
+                None,
+                {
+                    "component": "ConnectionManager",
+                    "backend": backend.name,
+                    "error": error,
+                },
+            )
+        backend.up = False
+        backend.last_error = error
+
+    async def _check(self, backend: BackendState) -> bool:
+        try:
+            healthy = await asyncio.wait_for(
+                _call(backend.check), timeout=self.check_timeout
+            )
+            error = None if healthy else "health check failed"
+        except Exception as e:
+            healthy, error = False, str(e) or type(e).__name__
+
+        backend.checked = True
+        backend.last_checked_at = time.time()
+        if healthy:
+            if not backend.up:
+                log_debug(
+                    "Backend recovered",
+                    None,
+                    {"component": "ConnectionManager", "backend": backend.name},
+                )
+            backend.up = True
+            backend.consecutive_failures = 0
+            backend.last_error = None
+            backend.down_since = None
+            return True
+
+        backend.consecutive_failures += 1
+        self._set_down(backend, error)
+        return False
+
+    async def _reconnect(self, backend: BackendState):
+        if backend.reconnect is None:
+            return
+        try:
+            await asyncio.wait_for(_call(backend.reconnect), timeout=self.check_timeout)
+        except Exception as e:
+            backend.last_error = str(e) or type(e).__name__
+
+    async def _initial_check(self, backend: BackendState):
+        await self._reconnect(backend)
+        await self._check(backend)
+
+    async def _monitor(self, backend: BackendState):
+        while True:
+            if backend.up:
+                delay = self.interval
+            else:
+                delay = min(
+                    self.interval * 2 ** max(backend.consecutive_failures - 1, 0),
+                    self.max_backoff,
+                )
+            try:
+                await asyncio.wait_for(backend.wakeup.wait(), timeout=delay)
+            except TimeoutError:
+                pass
+            backend.wakeup.clear()
+
+            if not await self._check(backend):
+                await self._reconnect(backend)
+
+    async def _report_stats(self):
+        while True:
+            await asyncio.sleep(self.stats_interval)
+            log_info(
+                "Worker stats",
+                None,
+                {
+                    "component": "ConnectionManager",
+                    "pid": os.getpid(),
+                    "backends": {
+                        name: backend.up for name, backend in self._backends.items()
+                    },
+                    "stats": self.stats(),
+                },
+            )
@@ -0,0 +1,144 @@
+"""
+Temporal data converter used by the workers.
+
+Payloads are still "json/plain" (so any Temporal client or worker can read them),
+but are encoded and decoded with orjson instead of the stdlib json module.
+Values orjson can't encode (including integers beyond 64 bits) fall back to the
+default converter, and those payloads are marked so they're decoded with the
+stdlib too: orjson would read such integers back as floats. Unlike the stdlib,
+orjson writes NaN/Infinity as null, which doesn't occur in standard JSON log
+records.
+
+Payloads larger than PAYLOAD_COMPRESSION_THRESHOLD_BYTES can additionally be
+zstd-compressed by ZstdPayloadCodec. A compressed payload wraps the original one
+and is marked with the "binary/zstd" encoding, so uncompressed payloads (e.g.
+from clients without the codec) are passed through untouched. Workers always
+decode compressed payloads but only produce them with PAYLOAD_COMPRESSION=true:
+roll the codec out to every worker first, and only enable compression if
+everything reading these workflows (clients, other services) uses it too.
+"""
+
+import json
+import os
+from collections.abc import Sequence
+from typing import Any
+
+import orjson
+import zstandard
+from temporalio.api.common.v1 import Payload
+from temporalio.converter import (
+    CompositePayloadConverter,
+    DataConverter,
+    DefaultPayloadConverter,
+    JSONPlainPayloadConverter,
+    PayloadCodec,
+    value_to_type,
+)
+
+ZSTD_ENCODING = b"binary/zstd"
+
+_ORJSON_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+
+# Metadata marking json/plain payloads written by the stdlib fallback encoder
+STDLIB_JSON_KEY = "json-encoder"
+STDLIB_JSON_VALUE = b"stdlib"
+
+
+class OrjsonPlainPayloadConverter(JSONPlainPayloadConverter):
+    """json/plain converter that serializes with orjson."""
+
+    def to_payload(self, value: Any) -> Payload | None:
+        try:
+            data = orjson.dumps(value, option=_ORJSON_OPTIONS)
+        except TypeError:
+            # Types orjson doesn't know (e.g. sets, objects with dict()), or ints
+            # over 64 bits: use the default encoder, and mark the payload so it's
+            # decoded with it too
+            payload = super().to_payload(value)
+            if payload is not None:
+                payload.metadata[STDLIB_JSON_KEY] = STDLIB_JSON_VALUE
+            return payload
+        return Payload(metadata={"encoding": self.encoding.encode()}, data=data)
+
+    def from_payload(self, payload: Payload, type_hint: type | None = None) -> Any:
+        if payload.metadata.get(STDLIB_JSON_KEY) == STDLIB_JSON_VALUE:
+            # Written by the default encoder, e.g. with ints orjson reads as floats
+            return super().from_payload(payload, type_hint)
+        try:
+            value = orjson.loads(payload.data)
+        except orjson.JSONDecodeError:
+            # The stdlib encoder can emit NaN/Infinity, which orjson rejects
+            try:
+                value = json.loads(payload.data)
+            except json.JSONDecodeError as err:
+                raise RuntimeError("Failed parsing") from err
+        if type_hint:
+            value = value_to_type(type_hint, value, self._custom_type_converters)
+        return value
+
+
+class DataNadhiPayloadConverter(CompositePayloadConverter):
+    """Default payload converters, with orjson for json/plain."""
+
+    def __init__(self):
+        converters = DefaultPayloadConverter.default_encoding_payload_converters
+        super().__init__(
+            *(
+                OrjsonPlainPayloadConverter()
+                if isinstance(converter, JSONPlainPayloadConverter)
+                else converter
+                for converter in converters
+            )
+        )
+
+
+class ZstdPayloadCodec(PayloadCodec):
+    """Compress payloads above a size threshold with zstd."""
+
+    def __init__(
+        self, threshold_bytes: int = 4096, level: int = 3, compress: bool = True
+    ):
+        self.threshold_bytes = threshold_bytes
+        self.level = level
+        self.compress = compress
+
+    async def encode(self, payloads: Sequence[Payload]) -> list[Payload]:
+        if not self.compress:
+            return list(payloads)
+        compressor = zstandard.ZstdCompressor(level=self.level)
+        encoded = []
+        for payload in payloads:
+            if payload.ByteSize() <= self.threshold_bytes:
+                encoded.append(payload)
+                continue
+            encoded.append(
+                Payload(
+                    metadata={"encoding": ZSTD_ENCODING},
+                    data=compressor.compress(payload.SerializeToString()),
+                )
+            )
+        return encoded
+
+    async def decode(self, payloads: Sequence[Payload]) -> list[Payload]:
+        decompressor = zstandard.ZstdDecompressor()
+        decoded = []
+        for payload in payloads:
+            if payload.metadata.get("encoding") != ZSTD_ENCODING:
+                decoded.append(payload)
+                continue
+            decoded.append(Payload.FromString(decompressor.decompress(payload.data)))
+        return decoded
+
+
+def build_data_converter() -> DataConverter:
+    """Data converter for worker clients, configured from the environment."""
+    return DataConverter(
+        payload_converter_class=DataNadhiPayloadConverter,
+        payload_codec=ZstdPayloadCodec(
+            threshold_bytes=int(
+                os.getenv("PAYLOAD_COMPRESSION_THRESHOLD_BYTES", "4096")
+            ),
+            level=int(os.getenv("PAYLOAD_COMPRESSION_LEVEL", "3")),
+            compress=os.getenv("PAYLOAD_COMPRESSION", "false").lower() == "true",
+        ),
+    )
@@ -0,0 +1,88 @@
+import asyncio
+import os
+
+from dotenv import load_dotenv
+from pymongo import AsyncMongoClient, errors
+
+from utils.connection_manager import ConnectionManager
+from utils.logger import log_debug, log_error
+
+load_dotenv()
+
+
+class AsyncMongoService:
+    """asyncio variant of MongoService for use inside async activities."""
+
+    instance = None
+
+    def __new__(cls, mongo_url=None):
+        if cls.instance:
+            return cls.instance
+        obj = super().__new__(cls)
+        cls.instance = obj
+        return obj
+
+    def __init__(self, mongo_url=None):
+        if getattr(self, "_initialized", False):
+            return
+
+        self.mongo_url = mongo_url or os.getenv("MONGO_URL")
+        if not self.mongo_url:
+            raise ValueError("Missing MONGO_URL in environment")
+
+        self.max_pool_size = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+        self.min_pool_size = int(os.getenv("MONGO_MIN_POOL_SIZE", "2"))
+
+        self.client = None
+        self.connected = False
+        self._connect_lock = asyncio.Lock()
+        self._initialized = True
+
+    async def is_connected(self):
+        """Checks actual Mongo health, not just stored flag."""
+        if not self.client:
+            return False
+        try:
+            await self.client.admin.command("ping")
+            return True
+        except Exception:
+            return False
+
+    async def ensure_client(self):
+        """Create the client on first use; health is tracked by ConnectionManager."""
+        if self.client:
+            return
+        async with self._connect_lock:
+            if not self.client:
+                await self.connect()
+
+    async def connect(self):
+        """Connect to MongoDB once, fail fast if not possible."""
+        try:
+            client = AsyncMongoClient(
+                self.mongo_url,
+                maxPoolSize=self.max_pool_size,
+                minPoolSize=self.min_pool_size,
+                serverSelectionTimeoutMS=5000,
+                socketTimeoutMS=45000,
+            )
+            await client.admin.command("ping")
+            if self.client:
+                await self.client.close()
+            self.client = client
+            self.connected = True
+            log_debug("Connected to MongoDB", None, {"component": "AsyncMongoService"})
+        except errors.PyMongoError as e:
+            self.connected = False
+            log_error(
+                "MongoDB connection failed",
+                None,
+                {"component": "AsyncMongoService", "error": str(e)},
+            )
+            raise
+
+    async def db(self, name: str = os.environ["MONGO_DATABASE"]):
+        # Fail fast while the background monitor has Mongo marked down
+        ConnectionManager().raise_if_down("mongo")
+        await self.ensure_client()
+        return self.client.get_database(name)
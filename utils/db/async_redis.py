@@ -0,0 +1,178 @@
+import asyncio
+import os
+
+import redis.asyncio as redis
+from dotenv import load_dotenv
+
+from utils.connection_manager import ConnectionManager
+from utils.logger import log_debug, log_warn
+
+load_dotenv()
+
+
+class AsyncRedisService:
+    """asyncio variant of RedisService backed by a shared connection pool."""
+
+    instance = None
+
+    def __new__(cls, redis_url=None):
+        if cls.instance:
+            return cls.instance
+        obj = super().__new__(cls)
+        cls.instance = obj
+        return obj
+
+    def __init__(self, redis_url=None):
+        if getattr(self, "_initialized", False):
+            return
+
+        self.redis_url = redis_url or os.getenv("REDIS_URL")
+        if not self.redis_url:
+            raise ValueError("Missing REDIS_URL in environment")
+
+        self.max_connections = int(os.getenv("REDIS_MAX_CONNECTIONS", "100"))
+
+        self.client = None
+        self.connected = False
+        self._scripts = {}  # Lua source -> registered script
+        self._connect_lock = asyncio.Lock()
+        self._initialized = True
+
+    async def connect(self):
+        try:
+            pool = redis.ConnectionPool.from_url(
+                self.redis_url,
+                decode_responses=True,
+                max_connections=self.max_connections,
+            )
+            client = redis.Redis(connection_pool=pool)
+            await client.ping()
+            if self.client:
+                await self.client.aclose(close_connection_pool=True)
+            self.client = client
+            self.connected = True
+            log_debug("Connected to Redis", None, {"component": "AsyncRedisService"})
+        except redis.RedisError as e:
+            self.connected = False
+            log_warn(
+                "Redis connection failed",
+                None,
+                {"component": "AsyncRedisService", "error": str(e)},
+            )
+
+    async def is_connected(self) -> bool:
+        if not self.client:
+            return False
+        try:
+            await self.client.ping()
+            return True
+        except Exception:
+            return False
+
+    async def ensure_client(self):
+        """Create the client on first use; health is tracked by ConnectionManager."""
+        if self.client:
+            return
+        async with self._connect_lock:
+            if not self.client:
+                await self.connect()
+
+    async def safe_get(self, key: str):
+        manager = ConnectionManager()
+        if not manager.is_up("redis"):
+            return None
+        try:
+            await self.ensure_client()
+            if not self.client:
+                return None
+            return await self.client.get(key)
+        except Exception as e:
+            manager.mark_down("redis", e)
+            log_warn(
+                "Redis get failed",
+                None,
+                {"component": "AsyncRedisService", "error": str(e)},
+            )
+            return None
+
+    async def safe_set(self, key: str, value, ex: int = None):
+        manager = ConnectionManager()
+        if not manager.is_up("redis"):
+            return
+        try:
+            await self.ensure_client()
+            if not self.client:
+                return
+            await self.client.set(key, value, ex=ex)
+        except Exception as e:
+            manager.mark_down("redis", e)
+            log_warn(
+                "Redis set failed",
+                None,
+                {"component": "AsyncRedisService", "error": str(e)},
+            )
+
+    async def safe_mget(self, keys: list[str]) -> list:
+        """Fetch several keys in one round trip; all None if Redis is unavailable."""
+        manager = ConnectionManager()
+        if not keys or not manager.is_up("redis"):
+            return [None] * len(keys)
+        try:
+            await self.ensure_client()
+            if not self.client:
+                return [None] * len(keys)
+            return await self.client.mget(keys)
+        except Exception as e:
+            manager.mark_down("redis", e)
+            log_warn(
+                "Redis mget failed",
+                None,
+                {"component": "AsyncRedisService", "error": str(e)},
+            )
+            return [None] * len(keys)
+
+    async def safe_set_many(self, mapping: dict, ex: int = None):
+        """Set several keys with the same expiry in one pipelined round trip."""
+        manager = ConnectionManager()
+        if not mapping or not manager.is_up("redis"):
+            return
+        try:
+            await self.ensure_client()
+            if not self.client:
+                return
+            async with self.client.pipeline(transaction=False) as pipe:
+                for key, value in mapping.items():
+                    pipe.set(key, value, ex=ex)
+                await pipe.execute()
+        except Exception as e:
+            manager.mark_down("redis", e)
+            log_warn(
+                "Redis pipelined set failed",
+                None,
+                {"component": "AsyncRedisService", "error": str(e)},
+            )
+
+    async def safe_run_script(
+        self, source: str, keys: list[str], args: list, default=None
+    ):
+        """Run a Lua script (loaded once per client); default if Redis is down."""
+        manager = ConnectionManager()
+        if not manager.is_up("redis"):
+            return default
+        try:
+            await self.ensure_client()
+            if not self.client:
+                return default
+            script = self._scripts.get(source)
+            if script is None or script.registered_client is not self.client:
+                script = self.client.register_script(source)
+                self._scripts[source] = script
+            return await script(keys=keys, args=args)
+        except Exception as e:
+            manager.mark_down("redis", e)
+            log_warn(
+                "Redis script failed",
+                None,
+                {"component": "AsyncRedisService", "error": str(e)},
+            )
+            return default
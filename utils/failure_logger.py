@@ -4,6 +4,8 @@ from typing import Any
 
 from temporalio import activity
 
+from utils.batch_records import resolve_batch_payloads, resolve_batch_record
+from utils.claim_check import resolve_claim_check
 from utils.logger import log_error
 from utils.minio_service import MinioService
 
@@ -97,6 +99,25 @@ async def log_failure(
     message_id = ctx.get("messageId")
     original_input = ctx.get("originalInput") or ctx.get("logData")
 
+    # Failure logs should be self-contained, so load offloaded payloads back in
+    # (best effort: keep the reference if MinIO can't serve it)
+    try:
+        # Records of a batch stored in MinIO are passed by {records_ref, index}
+        if original_input is None and ctx.get("batchRecord"):
+            record = await resolve_batch_record(ctx["batchRecord"])
+            original_input = record.get("log_data", {})
+            message_id = message_id or record.get("messageId")
+        # and so are chunk outputs, e.g. the data a batch delivery failed on
+        [current_input] = await resolve_batch_payloads([current_input])
+        original_input = await resolve_claim_check(original_input)
+        current_input = await resolve_claim_check(current_input)
+    except Exception as resolve_exc:
+        log_error(
+            "Could not resolve claim-check payload",
+            ctx,
+            {"component": "claim_check", "error": str(resolve_exc)},
+        )
+
     # Build failure data manually with the stack trace we received
     failure_data = {
         "timestamp": datetime.utcnow().isoformat() + "Z",
@@ -0,0 +1,263 @@
+"""
+Keypaths: compiled references into nested records, shared by all workers.
+
+Syntax (always starting at the record root, "$"):
+    $.a.b           dict keys
+    $.items[0]      list index (negative indices count from the end)
+    $.items[*].id   every element of a list (or every value of a dict)
+    $['a.b']["c"]   quoted keys, for names containing "." or "["
+
+Paths are parsed once and cached. Lookups never copy; set_in/delete_in/update_in
+copy only the containers along the path and share everything else with the
+input (structural sharing), so records can be passed between nodes safely.
+"""
+
+from collections.abc import Callable
+from functools import lru_cache
+from typing import Any
+
+
+class _Wildcard:
+    """Path segment matching every element of a list or value of a dict."""
+
+    __slots__ = ()
+
+    def __repr__(self):
+        return "[*]"
+
+    def __reduce__(self):
+        return "WILDCARD"
+
+
+WILDCARD = _Wildcard()
+
+Segment = str | int | _Wildcard
+Getter = Callable[[Any], Any]
+
+_MISSING = object()
+
+
+def is_keypath(value: Any) -> bool:
+    return type(value) is str and (value.startswith("$.") or value.startswith("$["))
+
+
+@lru_cache(maxsize=4096)
+def parse_keypath(path: str) -> tuple[Segment, ...]:
+    """
+    Parse a keypath into its segments.
+
+    Raises:
+        ValueError: if the path is malformed
+    """
+    if not isinstance(path, str) or not path.startswith("$"):
+        raise ValueError(f"Keypath must start with '$': {path!r}")
+
+    segments: list[Segment] = []
+    i, n = 1, len(path)
+    while i < n:
+        char = path[i]
+        if char == ".":
+            end = i + 1
+            while end < n and path[end] not in ".[":
+                end += 1
+            segments.append(path[i + 1 : end])
+            i = end
+        elif char == "[":
+            if i + 1 < n and path[i + 1] in "'\"":
+                quote, end, name = path[i + 1], i + 2, []
+                while end < n and path[end] != quote:
+                    if path[end] == "\\" and end + 1 < n:
+                        end += 1
+                    name.append(path[end])
+                    end += 1
+                if end + 1 >= n or path[end + 1] != "]":
+                    raise ValueError(f"Unterminated quoted key in keypath: {path!r}")
+                segments.append("".join(name))
+                i = end + 2
+            else:
+                end = path.find("]", i)
+                if end == -1:
+                    raise ValueError(f"Unterminated '[' in keypath: {path!r}")
+                token = path[i + 1 : end].strip()
+                if token == "*":
+                    segments.append(WILDCARD)
+                else:
+                    try:
+                        segments.append(int(token))
+                    except ValueError:
+                        raise ValueError(
+                            f"Invalid index [{token}] in keypath: {path!r}"
+                        ) from None
+                i = end + 1
+        else:
+            raise ValueError(f"Unexpected {char!r} at {i} in keypath: {path!r}")
+    return tuple(segments)
+
+
+def get_in(data: Any, segments: tuple, default: Any = None) -> Any:
+    """
+    Value at segments, or default if the path doesn't exist.
+
+    A wildcard returns a list of the values matched under it (flattened across
+    nested wildcards), skipping elements where the rest of the path is missing.
+    """
+    current = data
+    for index, segment in enumerate(segments):
+        if segment is WILDCARD:
+            if isinstance(current, list):
+                items = current
+            elif isinstance(current, dict):
+                items = current.values()
+            else:
+                return default
+            rest = segments[index + 1 :]
+            nested = WILDCARD in rest
+            matches = []
+            for item in items:
+                value = get_in(item, rest, _MISSING)
+                if value is _MISSING:
+                    continue
+                if nested:
+                    matches.extend(value)
+                else:
+                    matches.append(value)
+            return matches
+        if type(segment) is int:
+            if isinstance(current, list) and -len(current) <= segment < len(current):
+                current = current[segment]
+            else:
+                return default
+        elif isinstance(current, dict) and segment in current:
+            current = current[segment]
+        else:
+            return default
+    return current
+
+
+@lru_cache(maxsize=4096)
+def compile_getter(path: str) -> Getter:
+    """Cached value getter for a keypath string; missing paths give None."""
+    segments = parse_keypath(path)
+    if not all(type(segment) is str for segment in segments):
+        return lambda data: get_in(data, segments)
+
+    # Plain dict keys: the common case, kept to a tight loop
+    def get_keys(data):
+        current = data
+        for k in segments:
+            if isinstance(current, dict) and k in current:
+                current = current[k]
+            else:
+                return None
+        return current
+
+    return get_keys
+
+
+def _update(current: Any, segments: tuple, index: int, fn, create: bool) -> Any:
+    if index == len(segments):
+        return fn(current)
+    segment = segments[index]
+
+    if segment is WILDCARD:
+        if isinstance(current, list):
+            updated = [_update(v, segments, index + 1, fn, create) for v in current]
+            if any(new is not old for new, old in zip(updated, current, strict=True)):
+                return updated
+        elif isinstance(current, dict):
+            updated = {
+                k: _update(v, segments, index + 1, fn, create)
+                for k, v in current.items()
+            }
+            if any(updated[k] is not v for k, v in current.items()):
+                return updated
+        return current
+
+    if type(segment) is int:
+        if isinstance(current, list) and -len(current) <= segment < len(current):
+            child = current[segment]
+            new_child = _update(child, segments, index + 1, fn, create)
+            if new_child is child:
+                return current
+            updated = list(current)
+            updated[segment] = new_child
+            return updated
+        if not create:
+            return current
+        if not isinstance(current, list):
+            raise TypeError(f"Cannot index a non-list with [{segment}]")
+        raise ValueError(f"List index out of range: [{segment}]")
+
+    if isinstance(current, dict) and segment in current:
+        child = current[segment]
+        new_child = _update(child, segments, index + 1, fn, create)
+        if new_child is child:
+            return current
+    elif create:
+        # Missing or non-dict intermediates become dicts
+        if not isinstance(current, dict):
+            current = {}
+        new_child = _update(None, segments, index + 1, fn, create)
+    else:
+        return current
+
+    updated = dict(current)
+    updated[segment] = new_child
+    return updated
+
+
+def update_in(data: Any, segments: tuple, fn: Callable, create: bool = False) -> Any:
+    """
+    Return a new record with fn applied to the value at segments.
+
+    Without create, a missing path leaves the record as is (and fn isn't called).
+    With create, missing or non-dict intermediate keys are replaced with dicts.
+    Returns the input itself when nothing changed.
+    """
+    return _update(data, segments, 0, fn, create)
+
+
+def set_in(data: dict, segments: tuple, value: Any) -> dict:
+    """
+    Return a new record with value set at segments.
+
+    Missing or non-dict intermediate values are replaced with new dicts; list
+    indices must already exist.
+    """
+    if segments and type(segments[0]) is str and not isinstance(data, dict):
+        raise TypeError(f"Cannot set key {segments[0]!r} on a non-object record")
+    return _update(data, tuple(segments), 0, lambda _: value, True)
+
+
+def _without(node: Any, segment: Segment) -> Any:
+    if segment is WILDCARD:
+        if isinstance(node, list) and node:
+            return []
+        if isinstance(node, dict) and node:
+            return {}
+        return node
+    if type(segment) is int:
+        if isinstance(node, list) and -len(node) <= segment < len(node):
+            updated = list(node)
+            del updated[segment]
+            return updated
+        return node
+    if isinstance(node, dict) and segment in node:
+        updated = dict(node)
+        del updated[segment]
+        return updated
+    return node
+
+
+def delete_in(data: Any, segments: tuple) -> Any:
+    """
+    Return a new record without the value at segments.
+
+    If the path doesn't exist the input itself is returned.
+    """
+    if not segments:
+        return data
+    last = segments[-1]
+    return _update(
+        data, tuple(segments[:-1]), 0, lambda node: _without(node, last), False
+    )
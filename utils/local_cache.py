@@ -0,0 +1,90 @@
+"""
+Bounded, per-process LRU cache with TTL.
+
+Sits in front of Redis/Mongo for hot config lookups so that most calls are served
+from worker memory without a network round trip.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+_MISSING = object()
+
+
+class LocalCache:
+    def __init__(self, name: str, max_size: int = 1024, ttl_seconds: float = 60.0):
+        if max_size <= 0:
+            raise ValueError("max_size must be greater than 0")
+        if ttl_seconds <= 0:
+            raise ValueError("ttl_seconds must be greater than 0")
+
+        self.name = name
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the cached value, or default on a miss or expired entry."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl_seconds: float | None = None):
+        """Store a value, evicting the least recently used entries if full."""
+        expires_at = time.monotonic() + (ttl_seconds or self.ttl_seconds)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            return self._entries.pop(key, _MISSING) is not _MISSING
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict[str, Any]:
+        """Counters for logging/metrics."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
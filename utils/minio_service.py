@@ -1,9 +1,18 @@
 import json
 import os
 from io import BytesIO
+from typing import Any
 
+import urllib3
 from minio import Minio
 
+from utils.connection_manager import ConnectionManager
+
+# Errors meaning MinIO can't be reached. Anything else (e.g. an S3Error for a
+# missing bucket or denied access, or data that isn't JSON serializable) is
+# specific to the call and doesn't mark the backend down for every other caller.
+CONNECTION_ERRORS = (ConnectionError, TimeoutError, urllib3.exceptions.HTTPError)
+
 
 class MinioService:
     _instance = None
@@ -40,6 +49,13 @@ class MinioService:
 
         self._initialized = True
 
+    def is_connected(self) -> bool:
+        """Health check used by ConnectionManager."""
+        try:
+            return self.client.bucket_exists(self.bucket_name)
+        except Exception:
+            return False
+
     def upload_json(self, object_path: str, data: dict) -> bool:
         """
         Upload JSON data to MinIO.
@@ -51,6 +67,10 @@ class MinioService:
         Returns:
             True if successful, False otherwise
         """
+        manager = ConnectionManager()
+        if not manager.is_up("minio"):
+            print(f"Skipping MinIO upload, backend marked down: {object_path}")
+            return False
         try:
             json_data = json.dumps(data, indent=2)
             json_bytes = json_data.encode("utf-8")
@@ -64,6 +84,51 @@ class MinioService:
                 content_type="application/json",
             )
             return True
+        except CONNECTION_ERRORS as e:
+            manager.mark_down("minio", e)
+            print(f"Failed to upload to MinIO: {e}")
+            return False
         except Exception as e:
             print(f"Failed to upload to MinIO: {e}")
             return False
+
+    def put_json(self, object_path: str, data: Any, bucket_name: str | None = None):
+        """
+        Upload a JSON value to MinIO (compact encoding).
+
+        Unlike upload_json this is not best effort: it raises if MinIO is down or
+        the upload fails.
+        """
+        manager = ConnectionManager()
+        manager.raise_if_down("minio")
+        json_bytes = json.dumps(data, separators=(",", ":")).encode("utf-8")
+        try:
+            self.client.put_object(
+                bucket_name or self.bucket_name,
+                object_path,
+                BytesIO(json_bytes),
+                length=len(json_bytes),
+                content_type="application/json",
+            )
+        except CONNECTION_ERRORS as e:
+            manager.mark_down("minio", e)
+            raise
+
+    def get_json(self, object_path: str, bucket_name: str | None = None):
+        """
+        Download and parse a JSON object from MinIO.
+
+        Args:
+            object_path: Path within bucket
+            bucket_name: Bucket to read from (defaults to the configured bucket)
+
+        Returns:
+            Parsed JSON value; raises on missing object or connection errors
+        """
+        ConnectionManager().raise_if_down("minio")
+        response = self.client.get_object(bucket_name or self.bucket_name, object_path)
+        try:
+            return json.loads(response.read())
+        finally:
+            response.close()
+            response.release_conn()
@@ -0,0 +1,178 @@
+"""
+Redis token-bucket rate limiter shared by every worker process.
+
+Each key (e.g. a connector and channel) has a bucket refilled at `rate` tokens
+per second up to `burst`. Refill and take happen atomically in a Lua script
+using the Redis server clock, so all workers draw from the same bucket. When an
+API answers with Retry-After, block() holds the key back for every worker until
+it has passed.
+
+If Redis is unavailable the limiter fails open: sends are only held back by
+Retry-After blocks seen in this process.
+"""
+
+import asyncio
+import time
+
+from utils.db.async_redis import AsyncRedisService
+from utils.logger import log_debug
+
+KEY_PREFIX = "datanadhiworker:ratelimit"
+
+# KEYS: bucket, block. ARGV: rate (tokens/s), burst.
+# Returns 0 if a token was taken, else milliseconds to wait before trying again.
+ACQUIRE_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000 + math.floor(tonumber(now_parts[2]) / 1000)
+
+local blocked_until = tonumber(redis.call('GET', KEYS[2]) or '0')
+if blocked_until > now then
+    return blocked_until - now
+end
+
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(now - ts, 0) * rate / 1000)
+
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = math.ceil((1 - tokens) * 1000 / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst * 1000 / rate) + 1000)
+return wait
+"""
+
+# KEYS: block. ARGV: milliseconds. Extends (never shortens) the block.
+BLOCK_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000 + math.floor(tonumber(now_parts[2]) / 1000)
+local until_ms = now + tonumber(ARGV[1])
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+if until_ms > current then
+    redis.call('SET', KEYS[1], until_ms, 'PX', tonumber(ARGV[1]))
+end
+return until_ms - now
+"""
+
+
+class RateLimitedError(Exception):
+    """Still rate limited after waiting as long as allowed (retryable)."""
+
+    def __init__(self, message: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        burst: int,
+        max_wait_seconds: float = 60.0,
+    ):
+        if rate <= 0:
+            raise ValueError("rate must be greater than 0")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.max_wait_seconds = max_wait_seconds
+
+        self.waiting = 0  # Sends in this process currently held back
+        self.acquired = 0
+        self.throttled = 0  # Acquires that had to wait
+        self.throttle_seconds = 0.0
+        self.blocks = 0  # Retry-After responses recorded
+
+        # key -> monotonic time; blocks seen by this process, kept even without Redis
+        self._blocked_until: dict[str, float] = {}
+
+    def _keys(self, key: str) -> list[str]:
+        # Hash tag keeps both keys in one slot on Redis Cluster
+        base = f"{KEY_PREFIX}:{{{self.name}:{key}}}"
+        return [f"{base}:bucket", f"{base}:block"]
+
+    async def acquire(self, key: str, ctx: dict | None = None) -> float:
+        """
+        Wait for a token for key.
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            RateLimitedError: if a token isn't available within max_wait_seconds
+        """
+        redis = AsyncRedisService()
+        keys = self._keys(key)
+        started = time.monotonic()
+        waited = False
+        try:
+            while True:
+                wait = self._blocked_until.get(key, 0) - time.monotonic()
+                if wait <= 0:
+                    self._blocked_until.pop(key, None)
+                    wait_ms = await redis.safe_run_script(
+                        ACQUIRE_SCRIPT, keys, [self.rate, self.burst], default=0
+                    )
+                    if not wait_ms:
+                        break
+                    wait = wait_ms / 1000
+
+                elapsed = time.monotonic() - started
+                if elapsed + wait > self.max_wait_seconds:
+                    raise RateLimitedError(
+                        f"Rate limited on {self.name} {key} for {wait:.1f}s",
+                        retry_after=wait,
+                    )
+                if not waited:
+                    waited = True
+                    self.waiting += 1
+                    self.throttled += 1
+                    log_debug(
+                        "Rate limited, waiting",
+                        ctx,
+                        {"component": "rate_limiter", "limiter": self.name},
+                    )
+                await asyncio.sleep(wait)
+        finally:
+            elapsed = time.monotonic() - started
+            if waited:
+                self.waiting -= 1
+                self.throttle_seconds += elapsed
+
+        self.acquired += 1
+        return elapsed
+
+    async def block(self, key: str, seconds: float):
+        """Hold key back for every worker for seconds (e.g. from Retry-After)."""
+        self.blocks += 1
+        blocked_until = time.monotonic() + seconds
+        if blocked_until > self._blocked_until.get(key, 0):
+            self._blocked_until[key] = blocked_until
+        await AsyncRedisService().safe_run_script(
+            BLOCK_SCRIPT, [self._keys(key)[1]], [max(int(seconds * 1000), 1)]
+        )
+
+    def stats(self) -> dict:
+        """
+        Counters for this process: sends waiting right now, acquires that had
+        to wait and the total seconds spent waiting. Logged periodically by
+        ConnectionManager.
+        """
+        return {
+            "name": self.name,
+            "waiting": self.waiting,
+            "acquired": self.acquired,
+            "throttled": self.throttled,
+            "throttle_seconds": self.throttle_seconds,
+            "blocks": self.blocks,
+        }
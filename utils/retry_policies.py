@@ -46,3 +46,19 @@ def get_default_retry_policy() -> RetryPolicy:
         maximum_attempts=3,
         non_retryable_error_types=NON_RETRYABLE_EXCEPTIONS,
     )
+
+
+def get_config_activity_retry_policy(maximum_attempts: int = 3) -> RetryPolicy:
+    """
+    Retry policy for short, idempotent config-fetch activities.
+
+    Backs off faster than the default since these usually run as local activities
+    and a retry holds up the workflow task.
+    """
+    return RetryPolicy(
+        initial_interval=timedelta(milliseconds=200),
+        maximum_interval=timedelta(seconds=5),
+        backoff_coefficient=2.0,
+        maximum_attempts=maximum_attempts,
+        non_retryable_error_types=NON_RETRYABLE_EXCEPTIONS,
+    )
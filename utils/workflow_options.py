@@ -0,0 +1,64 @@
+"""
+Worker-level execution options read by workflows.
+
+main.py configures these once before the worker starts. The module is registered as
+a sandbox passthrough module so workflows see the configured instance instead of a
+fresh re-import.
+
+These options change which commands a workflow emits (e.g. local vs regular
+activities), so drain in-flight executions before changing them on a deployment.
+"""
+
+import os
+from dataclasses import dataclass, replace
+from datetime import timedelta
+
+
+@dataclass(frozen=True)
+class WorkflowOptions:
+    # Run config-fetch activities as local activities on the workflow worker
+    local_config_activities: bool = False
+    config_activity_start_to_close_timeout: timedelta = timedelta(seconds=10)
+    config_activity_schedule_to_close_timeout: timedelta = timedelta(minutes=1)
+    config_activity_maximum_attempts: int = 3
+    # Default cap on concurrently running nodes per TransformationWorkflow
+    max_parallel_branches: int = 10
+    # Records per run_pipeline_batch activity in BatchMainWorkflow
+    batch_chunk_size: int = 500
+    # Payloads above this many bytes are offloaded to MinIO (0 disables)
+    claim_check_threshold_bytes: int = 262144
+    # Default nodeOutputRetention for pipelines that don't set one
+    node_output_retention: str = "full"
+
+
+_options = WorkflowOptions(
+    local_config_activities=os.getenv("LOCAL_CONFIG_ACTIVITIES", "false").lower()
+    == "true",
+    config_activity_start_to_close_timeout=timedelta(
+        seconds=float(os.getenv("CONFIG_ACTIVITY_START_TO_CLOSE_SECONDS", "10"))
+    ),
+    config_activity_schedule_to_close_timeout=timedelta(
+        seconds=float(os.getenv("CONFIG_ACTIVITY_SCHEDULE_TO_CLOSE_SECONDS", "60"))
+    ),
+    config_activity_maximum_attempts=int(
+        os.getenv("CONFIG_ACTIVITY_MAXIMUM_ATTEMPTS", "3")
+    ),
+    max_parallel_branches=int(os.getenv("MAX_PARALLEL_BRANCHES", "10")),
+    batch_chunk_size=int(os.getenv("BATCH_CHUNK_SIZE", "500")),
+    claim_check_threshold_bytes=int(os.getenv("CLAIM_CHECK_THRESHOLD_BYTES", "262144")),
+    node_output_retention=os.getenv("NODE_OUTPUT_RETENTION", "full"),
+)
+
+# Pipeline config keys MainWorkflow forwards to TransformationWorkflow
+PIPELINE_EXECUTION_OPTIONS = ("executionMode", "maxParallelism", "nodeOutputRetention")
+
+
+def configure_workflow_options(**changes) -> WorkflowOptions:
+    """Override options (e.g. from CLI arguments). Call before the worker starts."""
+    global _options
+    _options = replace(_options, **changes)
+    return _options
+
+
+def get_workflow_options() -> WorkflowOptions:
+    return _options
@@ -4,6 +4,129 @@ Workflow-safe utility functions.
 These functions can be imported in workflows without triggering sandbox restrictions.
 """
 
+from collections.abc import Sequence
+from typing import Any
+
+from temporalio import workflow
+
+from utils.claim_check import is_claim_check
+from utils.retry_policies import get_config_activity_retry_policy
+from utils.workflow_options import get_workflow_options
+
+# Patch id gating the single config-bundle fetch. Executions started before it
+# replay the per-item fetch activities; drop the old branches once none of those
+# executions are left running.
+CONFIG_BUNDLE_PATCH = "config-bundle"
+
+# Patch id gating MainWorkflow's claim-check offload of large log_data
+CLAIM_CHECK_PATCH = "claim-check"
+
+# Patch id gating concurrent branch scheduling in TransformationWorkflow and the
+# per-node destination child ids it needs. Executions started before it replay
+# the sequential breadth-first traversal with the original child id.
+CONCURRENT_BRANCHES_PATCH = "concurrent-branches"
+
+
+async def execute_config_activity(activity: str, args: Sequence[Any]) -> Any:
+    """
+    Run a short, idempotent config-fetch activity.
+
+    Runs as a local activity when the worker is configured with
+    local_config_activities, otherwise as a regular activity. Either way it uses
+    the config-activity timeouts and retry settings from WorkflowOptions.
+    """
+    options = get_workflow_options()
+    retry_policy = get_config_activity_retry_policy(
+        options.config_activity_maximum_attempts
+    )
+
+    if options.local_config_activities:
+        return await workflow.execute_local_activity(
+            activity,
+            args=args,
+            start_to_close_timeout=options.config_activity_start_to_close_timeout,
+            schedule_to_close_timeout=options.config_activity_schedule_to_close_timeout,
+            retry_policy=retry_policy,
+        )
+
+    return await workflow.execute_activity(
+        activity,
+        args=args,
+        start_to_close_timeout=options.config_activity_start_to_close_timeout,
+        schedule_to_close_timeout=options.config_activity_schedule_to_close_timeout,
+        retry_policy=retry_policy,
+    )
+
+
+async def offload_large_payload(data: Any, ctx: dict) -> Any:
+    """
+    Swap data for a MinIO claim-check reference if it's above the threshold.
+
+    The threshold is worker configuration, so the decision is made by a local
+    activity and recorded in history with its result; the payload itself isn't
+    recorded again. Downstream activities resolve the reference when they read
+    the data.
+    """
+    if data is None or is_claim_check(data):
+        return data
+
+    options = get_workflow_options()
+    ref = await workflow.execute_local_activity(
+        "offload_payload",
+        args=(data, ctx),
+        start_to_close_timeout=options.config_activity_start_to_close_timeout,
+        schedule_to_close_timeout=options.config_activity_schedule_to_close_timeout,
+        retry_policy=get_config_activity_retry_policy(
+            options.config_activity_maximum_attempts
+        ),
+    )
+    return data if ref is None else ref
+
+
+def end_node_targets(node_config: dict) -> list[str]:
+    """
+    Destination target ids of an end node, in order and without duplicates.
+
+    An end node names one target ("target_id") or several ("target_ids", or a
+    list in "target_id").
+
+    Raises:
+        KeyError: if the node names no targets
+    """
+    targets = node_config.get("target_ids") or node_config["target_id"]
+    if isinstance(targets, str):
+        return [targets]
+    targets = list(dict.fromkeys(targets))
+    if not targets:
+        raise KeyError("target_id")
+    return targets
+
+
+def invalid_pipeline_nodes(workflow_config: dict) -> list[str]:
+    """
+    Structural problems in a workflow config, as "<node id> (<reason>)".
+
+    Only checks what doesn't need the transformation functions (which may come
+    from plugins installed on the transformation worker alone): malformed nodes,
+    transformation nodes without a function name and end nodes without targets.
+    """
+    invalid = []
+    for node_id, node_config in workflow_config.items():
+        if not isinstance(node_config, dict):
+            invalid.append(f"{node_id} (malformed node config)")
+            continue
+        node_type = node_config.get("type")
+        if node_type == "transformation":
+            fn_key = node_config.get("transformation_fn")
+            if not fn_key or not isinstance(fn_key, str):
+                invalid.append(f"{node_id} (no transformation_fn)")
+        elif node_type == "end":
+            try:
+                end_node_targets(node_config)
+            except (KeyError, TypeError):
+                invalid.append(f"{node_id} (no destination targets)")
+    return invalid
+
 
 def extract_exception_details(exc: Exception) -> tuple[str, str, str]:
     """